@@ -1,184 +1,317 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, and_, or_, insert, literal, null, select, tuple_, union_all, update, ColumnElement
+from typing import AsyncIterable, List, Optional, Dict, Any, Tuple
 from . import models, schemas
 from datetime import datetime
+import base64
+import json
+from collections import defaultdict
+from functools import wraps
+from threading import Lock
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+
+# Analytics results are cached briefly; reference lists (industries, provinces, ...)
+# change rarely and are kept longer. Entries are keyed on the data version, so a
+# write in any worker retires them; this worker's own writes also clear both.
+analytics_cache = TTLCache(maxsize=4, ttl=60)
+reference_cache = TTLCache(maxsize=64, ttl=300)
+_cache_lock = Lock()
+
+def invalidate_read_caches():
+    """Drop cached analytics and reference lists so the next read reflects the latest writes"""
+    with _cache_lock:
+        analytics_cache.clear()
+        reference_cache.clear()
+
+def _cached(cache: TTLCache):
+    """Cache a read coroutine's result in ``cache``, keyed on the data version, its name and arguments"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(db: AsyncSession, *args, **kwargs):
+            key = hashkey(func.__name__, await get_data_version(db), *args, **kwargs)
+            with _cache_lock:
+                result = cache.get(key)
+            if result is None:
+                result = await func(db, *args, **kwargs)
+                with _cache_lock:
+                    cache[key] = result
+            return result
+        return wrapper
+    return decorator
+
+async def get_data_version(db: AsyncSession) -> int:
+    """Read the data version counter, which every write bumps
+    
+    _cached reads it before running the query it caches, so a result stored
+    under a version never predates that version's write. A result computed
+    while a write lands is filed under the older version and is not served
+    with the new ETag.
+    """
+    return (await db.execute(
+        select(models.DataVersion.version).where(models.DataVersion.id == 1)
+    )).scalar_one()
+
+async def bump_data_version(db: AsyncSession):
+    """Increment the data version as part of the session's current transaction"""
+    await db.execute(
+        update(models.DataVersion)
+        .where(models.DataVersion.id == 1)
+        .values(version=models.DataVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+# List queries fetch rows from the cursor in batches of this size
+STREAM_BATCH_SIZE = 200
 
 # Business CRUD operations
-def get_business(db: Session, business_id: str) -> Optional[models.Business]:
-    return db.query(models.Business).filter(models.Business.id == business_id).first()
+async def get_business(db: AsyncSession, business_id: str) -> Optional[models.Business]:
+    stmt = (
+        select(models.Business)
+        .options(selectinload(models.Business.services))
+        .where(models.Business.id == business_id)
+    )
+    return (await db.scalars(stmt)).first()
 
-def get_businesses(
-    db: Session, 
-    skip: int = 0, 
-    limit: int = 100,
+def _business_filters(
     search: Optional[str] = None,
     industry: Optional[str] = None,
     province: Optional[str] = None,
     city: Optional[str] = None,
     account_status: Optional[str] = None
-) -> List[models.Business]:
-    query = db.query(models.Business)
+) -> List[ColumnElement]:
+    """Build the WHERE clauses shared by get_businesses and get_businesses_count"""
+    filters = []
     
-    # Apply filters
     if search:
-        search_filter = or_(
+        filters.append(or_(
             models.Business.company_name.ilike(f"%{search}%"),
             models.Business.email.ilike(f"%{search}%"),
             models.Business.phone.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
+        ))
     
     if industry:
-        query = query.filter(models.Business.industry == industry)
+        filters.append(models.Business.industry == industry)
     
     if province:
-        query = query.filter(models.Business.province == province)
+        filters.append(models.Business.province == province)
     
     if city:
-        query = query.filter(models.Business.city == city)
+        filters.append(models.Business.city == city)
     
     if account_status:
-        query = query.filter(models.Business.account_status == account_status)
+        filters.append(models.Business.account_status == account_status)
     
-    return query.offset(skip).limit(limit).all()
+    return filters
 
-def get_businesses_count(
-    db: Session,
+def encode_business_cursor(business: models.Business) -> str:
+    """Encode a business's (company_name, id) sort key as an opaque page cursor"""
+    key = json.dumps([business.company_name, business.id])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def decode_business_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a page cursor back into its (company_name, id) sort key"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    # Anything but two strings would otherwise reach the row comparison in SQL
+    if not (isinstance(key, list) and len(key) == 2 and all(isinstance(part, str) for part in key)):
+        raise ValueError("Invalid cursor")
+    company_name, business_id = key
+    return company_name, business_id
+
+async def get_businesses(
+    db: AsyncSession, 
+    skip: int = 0, 
+    limit: int = 100,
     search: Optional[str] = None,
     industry: Optional[str] = None,
     province: Optional[str] = None,
     city: Optional[str] = None,
-    account_status: Optional[str] = None
-) -> int:
-    query = db.query(models.Business)
-    
-    # Apply same filters as get_businesses
-    if search:
-        search_filter = or_(
-            models.Business.company_name.ilike(f"%{search}%"),
-            models.Business.email.ilike(f"%{search}%"),
-            models.Business.phone.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
-    
-    if industry:
-        query = query.filter(models.Business.industry == industry)
-    
-    if province:
-        query = query.filter(models.Business.province == province)
+    account_status: Optional[str] = None,
+    after: Optional[Tuple[str, str]] = None
+) -> AsyncIterable[Tuple[models.Business, Optional[int]]]:
+    """Stream a page of (business, total) rows in batches; iterate it once while the session is open
+    
+    Pages are ordered by (company_name, id). Passing the last row's key as
+    ``after`` seeks straight to the next page instead of using OFFSET.
+    
+    For OFFSET pages ``total`` is the filtered row count, computed by a
+    window function in the same statement. It is None for cursor pages,
+    where the window only sees rows past the cursor.
+    """
+    filters = _business_filters(search, industry, province, city, account_status)
+    total = func.count().over() if after is None else null()
+    stmt = (
+        select(models.Business, total.label("total"))
+        .options(selectinload(models.Business.services))
+        .where(*filters)
+        .order_by(models.Business.company_name, models.Business.id)
+    )
     
-    if city:
-        query = query.filter(models.Business.city == city)
+    if after is not None:
+        stmt = stmt.where(tuple_(models.Business.company_name, models.Business.id) > after)
+    else:
+        stmt = stmt.offset(skip)
     
-    if account_status:
-        query = query.filter(models.Business.account_status == account_status)
+    stmt = stmt.limit(limit).execution_options(yield_per=STREAM_BATCH_SIZE)
+    return await db.stream(stmt)
+
+async def get_businesses_count(
+    db: AsyncSession,
+    search: Optional[str] = None,
+    industry: Optional[str] = None,
+    province: Optional[str] = None,
+    city: Optional[str] = None,
+    account_status: Optional[str] = None
+) -> int:
+    filters = _business_filters(search, industry, province, city, account_status)
     
-    return query.count()
+    # Flat SELECT count(*) rather than Query.count()'s wrapping subquery
+    stmt = select(func.count()).select_from(models.Business).where(*filters)
+    return (await db.execute(stmt)).scalar_one()
 
-def create_business(db: Session, business: schemas.BusinessCreate) -> models.Business:
+async def create_business(db: AsyncSession, business: schemas.BusinessCreate) -> models.Business:
     # Calculate total monthly revenue from services
     total_monthly_revenue = sum(service.monthly_price for service in business.services)
     
-    # Create business object
-    db_business = models.Business(
-        id=business.id if hasattr(business, 'id') else None,
-        company_name=business.company_name,
-        industry=business.industry,
-        employee_count=business.employee_count,
-        annual_revenue=business.annual_revenue,
-        street_number=business.street_number,
-        street_name=business.street_name,
-        city=business.city,
-        province=business.province,
-        postal_code=business.postal_code,
-        country=business.country,
-        phone=business.phone,
-        email=business.email,
-        website=business.website,
-        bell_customer_since=business.bell_customer_since,
-        account_manager=business.account_manager,
-        total_monthly_revenue=total_monthly_revenue,
-        payment_method=business.payment_method,
-        account_status=business.account_status,
-        last_contact_date=business.last_contact_date,
-        notes=business.notes
-    )
-    
-    db.add(db_business)
-    db.commit()
-    db.refresh(db_business)
-    
-    # Create services
-    for service in business.services:
-        db_service = models.Service(
-            business_id=db_business.id,
-            service_type=service.service_type,
-            service_name=service.service_name,
-            monthly_price=service.monthly_price,
-            details=service.details,
-            contract_start=service.contract_start,
-            contract_end=service.contract_end,
-            status=service.status
-        )
-        db.add(db_service)
-    
-    db.commit()
-    db.refresh(db_business)
+    # Insert the business and read back server defaults in the same round-trip
+    business_row = {
+        "id": business.id if hasattr(business, 'id') else None,
+        "company_name": business.company_name,
+        "industry": business.industry,
+        "employee_count": business.employee_count,
+        "annual_revenue": business.annual_revenue,
+        "street_number": business.street_number,
+        "street_name": business.street_name,
+        "city": business.city,
+        "province": business.province,
+        "postal_code": business.postal_code,
+        "country": business.country,
+        "phone": business.phone,
+        "email": business.email,
+        "website": business.website,
+        "bell_customer_since": business.bell_customer_since,
+        "account_manager": business.account_manager,
+        "total_monthly_revenue": total_monthly_revenue,
+        "payment_method": business.payment_method,
+        "account_status": business.account_status,
+        "last_contact_date": business.last_contact_date,
+        "notes": business.notes
+    }
+    db_business = (await db.scalars(
+        insert(models.Business).returning(models.Business), [business_row]
+    )).one()
+    
+    # Create services in a single batched INSERT ... RETURNING
+    service_rows = [
+        {
+            "business_id": db_business.id,
+            "service_type": service.service_type,
+            "service_name": service.service_name,
+            "monthly_price": service.monthly_price,
+            "details": service.details,
+            "contract_start": service.contract_start,
+            "contract_end": service.contract_end,
+            "status": service.status
+        }
+        for service in business.services
+    ]
+    db_services = []
+    if service_rows:
+        db_services = (await db.scalars(
+            insert(models.Service).returning(models.Service, sort_by_parameter_order=True),
+            service_rows
+        )).all()
+    set_committed_value(db_business, "services", db_services)
+    
+    await bump_data_version(db)
+    await db.commit()
+    invalidate_read_caches()
     return db_business
 
-def update_business(db: Session, business_id: str, business_update: schemas.BusinessUpdate) -> Optional[models.Business]:
-    db_business = get_business(db, business_id)
+async def update_business(db: AsyncSession, business_id: str, business_update: schemas.BusinessUpdate) -> Optional[models.Business]:
+    db_business = await get_business(db, business_id)
     if not db_business:
         return None
     
     # Update only provided fields
-    update_data = business_update.dict(exclude_unset=True)
+    update_data = business_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_business, field, value)
     
-    db.commit()
-    db.refresh(db_business)
+    await bump_data_version(db)
+    await db.commit()
+    await db.refresh(db_business)
+    invalidate_read_caches()
     return db_business
 
-def delete_business(db: Session, business_id: str) -> bool:
-    db_business = get_business(db, business_id)
+async def delete_business(db: AsyncSession, business_id: str) -> bool:
+    db_business = await get_business(db, business_id)
     if not db_business:
         return False
     
-    db.delete(db_business)
-    db.commit()
+    await db.delete(db_business)
+    await bump_data_version(db)
+    await db.commit()
+    invalidate_read_caches()
     return True
 
 # Service CRUD operations
-def get_service(db: Session, service_id: int) -> Optional[models.Service]:
-    return db.query(models.Service).filter(models.Service.id == service_id).first()
+async def get_service(db: AsyncSession, service_id: int) -> Optional[models.Service]:
+    return await db.get(models.Service, service_id)
 
-def get_services_by_business(db: Session, business_id: str) -> List[models.Service]:
-    return db.query(models.Service).filter(models.Service.business_id == business_id).all()
+async def get_services_by_business(db: AsyncSession, business_id: str) -> List[models.Service]:
+    stmt = select(models.Service).where(models.Service.business_id == business_id)
+    return (await db.scalars(stmt)).all()
 
-def get_services(
-    db: Session,
+async def get_services(
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
     service_type: Optional[str] = None,
     status: Optional[str] = None,
     business_id: Optional[str] = None
-) -> List[models.Service]:
-    query = db.query(models.Service)
+) -> AsyncIterable[models.Service]:
+    """Stream a page of services in batches; iterate it once while the session is open"""
+    stmt = select(models.Service)
     
     if service_type:
-        query = query.filter(models.Service.service_type == service_type)
+        stmt = stmt.where(models.Service.service_type == service_type)
     
     if status:
-        query = query.filter(models.Service.status == status)
+        stmt = stmt.where(models.Service.status == status)
     
     if business_id:
-        query = query.filter(models.Service.business_id == business_id)
+        stmt = stmt.where(models.Service.business_id == business_id)
     
-    return query.offset(skip).limit(limit).all()
+    stmt = stmt.offset(skip).limit(limit).execution_options(yield_per=STREAM_BATCH_SIZE)
+    return await db.stream_scalars(stmt)
 
-def create_service(db: Session, service: schemas.ServiceCreate, business_id: str) -> models.Service:
+async def get_services_count(
+    db: AsyncSession,
+    service_type: Optional[str] = None,
+    status: Optional[str] = None,
+    business_id: Optional[str] = None
+) -> int:
+    stmt = select(func.count()).select_from(models.Service)
+    
+    # Apply same filters as get_services
+    if service_type:
+        stmt = stmt.where(models.Service.service_type == service_type)
+    
+    if status:
+        stmt = stmt.where(models.Service.status == status)
+    
+    if business_id:
+        stmt = stmt.where(models.Service.business_id == business_id)
+    
+    return (await db.execute(stmt)).scalar_one()
+
+async def create_service(db: AsyncSession, service: schemas.ServiceCreate, business_id: str) -> models.Service:
     db_service = models.Service(
         business_id=business_id,
         service_type=service.service_type,
@@ -191,117 +324,200 @@ def create_service(db: Session, service: schemas.ServiceCreate, business_id: str
     )
     
     db.add(db_service)
-    db.commit()
-    db.refresh(db_service)
     
     # Update business total monthly revenue
-    update_business_revenue(db, business_id)
+    await update_business_revenue(db, business_id, service.monthly_price)
+    
+    await bump_data_version(db)
+    await db.commit()
+    await db.refresh(db_service)
+    invalidate_read_caches()
     
     return db_service
 
-def update_service(db: Session, service_id: int, service_update: dict) -> Optional[models.Service]:
-    db_service = get_service(db, service_id)
+async def update_service(db: AsyncSession, service_id: int, service_update: schemas.ServiceUpdate) -> Optional[models.Service]:
+    db_service = await get_service(db, service_id)
     if not db_service:
         return None
     
-    for field, value in service_update.items():
-        setattr(db_service, field, value)
+    old_business_id = db_service.business_id
+    old_price = db_service.monthly_price
     
-    db.commit()
-    db.refresh(db_service)
+    # Update only provided fields
+    update_data = service_update.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_service, field, value)
     
     # Update business total monthly revenue
-    update_business_revenue(db, db_service.business_id)
+    new_price = db_service.monthly_price
+    if db_service.business_id != old_business_id:
+        await update_business_revenue(db, old_business_id, -old_price)
+        await update_business_revenue(db, db_service.business_id, new_price)
+    else:
+        await update_business_revenue(db, old_business_id, new_price - old_price)
+    
+    await bump_data_version(db)
+    await db.commit()
+    await db.refresh(db_service)
+    invalidate_read_caches()
     
     return db_service
 
-def delete_service(db: Session, service_id: int) -> bool:
-    db_service = get_service(db, service_id)
+async def delete_service(db: AsyncSession, service_id: int) -> bool:
+    db_service = await get_service(db, service_id)
     if not db_service:
         return False
     
-    business_id = db_service.business_id
-    db.delete(db_service)
-    db.commit()
-    
     # Update business total monthly revenue
-    update_business_revenue(db, business_id)
+    await update_business_revenue(db, db_service.business_id, -db_service.monthly_price)
+    
+    await db.delete(db_service)
+    await bump_data_version(db)
+    await db.commit()
+    invalidate_read_caches()
     
     return True
 
-def update_business_revenue(db: Session, business_id: str):
-    """Update the total monthly revenue for a business based on its services"""
-    total_revenue = db.query(func.sum(models.Service.monthly_price)).filter(
-        models.Service.business_id == business_id
-    ).scalar() or 0.0
-    
-    db_business = get_business(db, business_id)
-    if db_business:
-        db_business.total_monthly_revenue = total_revenue
-        db.commit()
+async def update_business_revenue(db: AsyncSession, business_id: str, delta: float):
+    """Apply a change in service pricing to a business's total monthly revenue"""
+    if not delta:
+        return
+    
+    await db.execute(
+        update(models.Business)
+        .where(models.Business.id == business_id)
+        .values(
+            total_monthly_revenue=func.coalesce(models.Business.total_monthly_revenue, 0.0) + delta
+        )
+        .execution_options(synchronize_session="fetch")
+    )
 
 # Analytics functions
-def get_revenue_analytics(db: Session) -> Dict[str, Any]:
-    # Total and average monthly revenue
-    total_revenue = db.query(func.sum(models.Business.total_monthly_revenue)).scalar() or 0.0
-    avg_revenue = db.query(func.avg(models.Business.total_monthly_revenue)).scalar() or 0.0
-    
-    # Revenue by industry
-    revenue_by_industry = db.query(
-        models.Business.industry,
-        func.sum(models.Business.total_monthly_revenue)
-    ).group_by(models.Business.industry).all()
-    
-    # Revenue by province
-    revenue_by_province = db.query(
-        models.Business.province,
-        func.sum(models.Business.total_monthly_revenue)
-    ).group_by(models.Business.province).all()
-    
-    # Revenue by service type
-    revenue_by_service_type = db.query(
-        models.Service.service_type,
-        func.sum(models.Service.monthly_price)
-    ).group_by(models.Service.service_type).all()
-    
+def _tagged_aggregate(tag: str, key, value):
+    """Select an aggregate as a (tag, key, value) row so several can share one UNION ALL"""
+    return select(
+        literal(tag).label("tag"),
+        key.label("key"),
+        value.label("value")
+    )
+
+def _pivot_tagged_rows(rows) -> Dict[str, Dict[Any, Any]]:
+    """Group (tag, key, value) rows into {tag: {key: value}}"""
+    pivot = defaultdict(dict)
+    for tag, key, value in rows:
+        pivot[tag][key] = value
+    return pivot
+
+def _revenue_aggregates() -> list:
+    return [
+        _tagged_aggregate(
+            "revenue_by_industry", models.Business.industry, func.sum(models.Business.total_monthly_revenue)
+        ).group_by(models.Business.industry),
+        _tagged_aggregate(
+            "revenue_by_province", models.Business.province, func.sum(models.Business.total_monthly_revenue)
+        ).group_by(models.Business.province),
+        _tagged_aggregate(
+            "revenue_by_service_type", models.Service.service_type, func.sum(models.Service.monthly_price)
+        ).group_by(models.Service.service_type),
+        _tagged_aggregate("total_monthly_revenue", null(), func.sum(models.Business.total_monthly_revenue)),
+        _tagged_aggregate("average_monthly_revenue", null(), func.avg(models.Business.total_monthly_revenue))
+    ]
+
+def _customer_aggregates() -> list:
+    return [
+        _tagged_aggregate(
+            "customers_by_industry", models.Business.industry, func.count(models.Business.id)
+        ).group_by(models.Business.industry),
+        _tagged_aggregate(
+            "customers_by_province", models.Business.province, func.count(models.Business.id)
+        ).group_by(models.Business.province),
+        _tagged_aggregate(
+            "customers_by_status", models.Business.account_status, func.count(models.Business.id)
+        ).group_by(models.Business.account_status),
+        _tagged_aggregate("total_customers", null(), func.count(models.Business.id)),
+        _tagged_aggregate("total_services", null(), func.count(models.Service.id))
+    ]
+
+def _revenue_analytics(analytics: Dict[str, Dict[Any, Any]]) -> Dict[str, Any]:
     return {
-        "total_monthly_revenue": total_revenue,
-        "average_monthly_revenue": avg_revenue,
-        "revenue_by_industry": dict(revenue_by_industry),
-        "revenue_by_province": dict(revenue_by_province),
-        "revenue_by_service_type": dict(revenue_by_service_type)
+        "total_monthly_revenue": analytics["total_monthly_revenue"].get(None) or 0.0,
+        "average_monthly_revenue": analytics["average_monthly_revenue"].get(None) or 0.0,
+        "revenue_by_industry": analytics["revenue_by_industry"],
+        "revenue_by_province": analytics["revenue_by_province"],
+        "revenue_by_service_type": analytics["revenue_by_service_type"]
     }
 
-def get_customer_analytics(db: Session) -> Dict[str, Any]:
-    # Total customers
-    total_customers = db.query(models.Business).count()
-    
-    # Customers by industry
-    customers_by_industry = db.query(
-        models.Business.industry,
-        func.count(models.Business.id)
-    ).group_by(models.Business.industry).all()
-    
-    # Customers by province
-    customers_by_province = db.query(
-        models.Business.province,
-        func.count(models.Business.id)
-    ).group_by(models.Business.province).all()
-    
-    # Customers by status
-    customers_by_status = db.query(
-        models.Business.account_status,
-        func.count(models.Business.id)
-    ).group_by(models.Business.account_status).all()
-    
-    # Average services per customer
-    total_services = db.query(models.Service).count()
+def _customer_analytics(analytics: Dict[str, Dict[Any, Any]]) -> Dict[str, Any]:
+    # Counts come back as floats when UNIONed with the revenue sums
+    total_customers = int(analytics["total_customers"].get(None) or 0)
+    total_services = int(analytics["total_services"].get(None) or 0)
     avg_services = total_services / total_customers if total_customers > 0 else 0
     
     return {
         "total_customers": total_customers,
-        "customers_by_industry": dict(customers_by_industry),
-        "customers_by_province": dict(customers_by_province),
-        "customers_by_status": dict(customers_by_status),
+        "customers_by_industry": {k: int(v) for k, v in analytics["customers_by_industry"].items()},
+        "customers_by_province": {k: int(v) for k, v in analytics["customers_by_province"].items()},
+        "customers_by_status": {k: int(v) for k, v in analytics["customers_by_status"].items()},
         "average_services_per_customer": avg_services
-    } 
\ No newline at end of file
+    }
+
+@_cached(analytics_cache)
+async def get_revenue_analytics(db: AsyncSession) -> Dict[str, Any]:
+    # All revenue aggregates in a single round-trip
+    analytics = _pivot_tagged_rows(await db.execute(union_all(*_revenue_aggregates())))
+    return _revenue_analytics(analytics)
+
+@_cached(analytics_cache)
+async def get_customer_analytics(db: AsyncSession) -> Dict[str, Any]:
+    # All customer aggregates in a single round-trip
+    analytics = _pivot_tagged_rows(await db.execute(union_all(*_customer_aggregates())))
+    return _customer_analytics(analytics)
+
+@_cached(analytics_cache)
+async def get_analytics_summary(db: AsyncSession) -> Dict[str, Any]:
+    # Revenue and customer aggregates together in a single round-trip
+    stmt = union_all(
+        *_revenue_aggregates(),
+        *_customer_aggregates(),
+        _tagged_aggregate(
+            "average_revenue_per_customer",
+            null(),
+            func.sum(models.Business.total_monthly_revenue) / func.nullif(func.count(models.Business.id), 0)
+        )
+    )
+    analytics = _pivot_tagged_rows(await db.execute(stmt))
+    revenue_analytics = _revenue_analytics(analytics)
+    customer_analytics = _customer_analytics(analytics)
+    
+    return {
+        "revenue": revenue_analytics,
+        "customers": customer_analytics,
+        "summary": {
+            "total_customers": customer_analytics["total_customers"],
+            "total_monthly_revenue": revenue_analytics["total_monthly_revenue"],
+            "average_revenue_per_customer": analytics["average_revenue_per_customer"].get(None) or 0
+        }
+    }
+
+# Reference lists
+@_cached(reference_cache)
+async def get_industries(db: AsyncSession) -> List[str]:
+    stmt = select(models.Business.industry).distinct().order_by(models.Business.industry)
+    return (await db.scalars(stmt)).all()
+
+@_cached(reference_cache)
+async def get_provinces(db: AsyncSession) -> List[str]:
+    stmt = select(models.Business.province).distinct().order_by(models.Business.province)
+    return (await db.scalars(stmt)).all()
+
+@_cached(reference_cache)
+async def get_cities(db: AsyncSession, province: Optional[str] = None) -> List[str]:
+    stmt = select(models.Business.city).distinct().order_by(models.Business.city)
+    if province:
+        stmt = stmt.where(models.Business.province == province)
+    return (await db.scalars(stmt)).all()
+
+@_cached(reference_cache)
+async def get_service_types(db: AsyncSession) -> List[str]:
+    stmt = select(models.Service.service_type).distinct().order_by(models.Service.service_type)
+    return (await db.scalars(stmt)).all()
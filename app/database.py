@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 import os
 from dotenv import load_dotenv
 
@@ -9,22 +11,56 @@ load_dotenv()
 # Database URL - can be overridden by environment variable
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./bell_canada.db")
 
+# Connection pool settings for server databases; SQLite keeps SQLAlchemy's defaults.
+# Set DB_NULL_POOL=true behind PgBouncer so connections aren't pooled twice.
+def _pool_options() -> dict:
+    if DATABASE_URL.startswith("sqlite"):
+        return {}
+    if os.getenv("DB_NULL_POOL", "false") == "true":
+        return {"poolclass": NullPool}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        # Check connections on checkout and recycle them before Render's idle timeout drops them
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+
 # Create SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+    insertmanyvalues_page_size=1000,
+    query_cache_size=1200,
+    **_pool_options()
+)
+
+# Async engine for the API; scripts keep using the sync engine above
+def _async_url(url: str) -> str:
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+async_engine = create_async_engine(
+    _async_url(DATABASE_URL),
+    insertmanyvalues_page_size=1000,
+    query_cache_size=1200,
+    **_pool_options()
 )
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay loaded after commit so RETURNING results can be served without a re-SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Create Base class
 Base = declarative_base()
 
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close() 
\ No newline at end of file
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db 
\ No newline at end of file
@@ -1,32 +1,54 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+import hashlib
 import math
 import os
 
 from . import crud, models, schemas
 from .database import engine, get_db
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
-
-# Run deployment setup if on Render
-if os.getenv('RENDER') == 'true':
-    import subprocess
-    try:
-        subprocess.run(["python3", "deploy_to_render.py"], check=True)
-    except Exception as e:
-        print(f"Warning: Deployment setup failed: {e}")
+# Create database tables (deployments run deploy_to_render.py once instead)
+if os.getenv("AUTO_CREATE_TABLES", "true") == "true":
+    models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Bell Canada B2B API",
     description="API for managing Bell Canada business customers and services",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
+# List responses are serialized straight from these precompiled adapters,
+# skipping FastAPI's second response_model validation and encoding pass
+_BUSINESS_LIST_ADAPTER = TypeAdapter(schemas.BusinessList)
+_SERVICE_LIST_ADAPTER = TypeAdapter(schemas.ServiceList)
+_SERVICES_ADAPTER = TypeAdapter(List[schemas.Service])
+
+def _json_response(adapter: TypeAdapter, value, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=adapter.dump_json(value), media_type="application/json", headers=headers)
+
+async def check_etag(request: Request, response: Response, db: AsyncSession = Depends(get_db)) -> str:
+    """Answer 304 Not Modified when the client's ETag still matches the data
+    
+    The ETag hashes the data version counter with the request path and query,
+    so repeat polls skip both the query work and the response body.
+    """
+    version = await crud.get_data_version(db)
+    digest = hashlib.blake2b(
+        f"{version}|{request.url.path}?{request.url.query}".encode(), digest_size=16
+    ).hexdigest()
+    etag = f'"{digest}"'
+    if request.headers.get("if-none-match") == etag:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return etag
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -37,7 +59,7 @@ app.add_middleware(
 )
 
 @app.get("/", tags=["Root"])
-def read_root():
+async def read_root():
     """Root endpoint with API information"""
     return {
         "message": "Bell Canada B2B API",
@@ -51,13 +73,13 @@ def read_root():
     }
 
 @app.get("/health", tags=["Health"])
-def health_check():
+async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "Bell Canada B2B API"}
 
 # Business endpoints
 @app.get("/api/v1/businesses", response_model=schemas.BusinessList, tags=["Businesses"])
-def read_businesses(
+async def read_businesses(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
     search: Optional[str] = Query(None, description="Search in company name, email, or phone"),
@@ -65,189 +87,229 @@ def read_businesses(
     province: Optional[str] = Query(None, description="Filter by province"),
     city: Optional[str] = Query(None, description="Filter by city"),
     account_status: Optional[str] = Query(None, description="Filter by account status"),
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor; replaces skip"),
+    db: AsyncSession = Depends(get_db),
+    etag: str = Depends(check_etag)
 ):
     """Get list of businesses with optional filtering and pagination"""
-    businesses = crud.get_businesses(
+    after_key = None
+    if after:
+        try:
+            after_key = crud.decode_business_cursor(after)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Convert each batch as it streams in so the ORM rows can be released
+    businesses = []
+    last_business = None
+    total = None
+    async for last_business, total in await crud.get_businesses(
         db, skip=skip, limit=limit, search=search, 
-        industry=industry, province=province, city=city, account_status=account_status
-    )
-    total = crud.get_businesses_count(
-        db, search=search, industry=industry, 
-        province=province, city=city, account_status=account_status
-    )
+        industry=industry, province=province, city=city, account_status=account_status,
+        after=after_key
+    ):
+        businesses.append(schemas.Business.model_validate(last_business))
+    
+    # A short page is the last one
+    next_cursor = None
+    if len(businesses) == limit:
+        next_cursor = crud.encode_business_cursor(last_business)
+    
+    # The window count is missing for cursor pages and pages past the end
+    if total is None:
+        total = await crud.get_businesses_count(
+            db, search=search, industry=industry, 
+            province=province, city=city, account_status=account_status
+        )
     
     pages = math.ceil(total / limit) if limit > 0 else 0
     
-    return schemas.BusinessList(
+    return _json_response(_BUSINESS_LIST_ADAPTER, schemas.BusinessList(
         businesses=businesses,
         total=total,
-        page=(skip // limit) + 1 if limit > 0 else 1,
+        # A cursor page's position isn't known without counting the rows before it
+        page=None if after_key else (skip // limit) + 1 if limit > 0 else 1,
         size=limit,
-        pages=pages
-    )
+        pages=pages,
+        next_cursor=next_cursor
+    ), headers={"ETag": etag})
 
 @app.get("/api/v1/businesses/{business_id}", response_model=schemas.Business, tags=["Businesses"])
-def read_business(business_id: str, db: Session = Depends(get_db)):
+async def read_business(business_id: str, db: AsyncSession = Depends(get_db)):
     """Get a specific business by ID"""
-    business = crud.get_business(db, business_id=business_id)
+    business = await crud.get_business(db, business_id=business_id)
     if business is None:
         raise HTTPException(status_code=404, detail="Business not found")
     return business
 
 @app.post("/api/v1/businesses", response_model=schemas.Business, status_code=status.HTTP_201_CREATED, tags=["Businesses"])
-def create_business(business: schemas.BusinessCreate, db: Session = Depends(get_db)):
+async def create_business(business: schemas.BusinessCreate, db: AsyncSession = Depends(get_db)):
     """Create a new business"""
     # Check if business with same ID already exists
     if hasattr(business, 'id') and business.id:
-        existing_business = crud.get_business(db, business_id=business.id)
+        existing_business = await crud.get_business(db, business_id=business.id)
         if existing_business:
             raise HTTPException(status_code=400, detail="Business with this ID already exists")
     
-    return crud.create_business(db=db, business=business)
+    return await crud.create_business(db=db, business=business)
 
 @app.put("/api/v1/businesses/{business_id}", response_model=schemas.Business, tags=["Businesses"])
-def update_business(business_id: str, business_update: schemas.BusinessUpdate, db: Session = Depends(get_db)):
+async def update_business(business_id: str, business_update: schemas.BusinessUpdate, db: AsyncSession = Depends(get_db)):
     """Update a business"""
-    business = crud.update_business(db=db, business_id=business_id, business_update=business_update)
+    business = await crud.update_business(db=db, business_id=business_id, business_update=business_update)
     if business is None:
         raise HTTPException(status_code=404, detail="Business not found")
     return business
 
 @app.delete("/api/v1/businesses/{business_id}", tags=["Businesses"])
-def delete_business(business_id: str, db: Session = Depends(get_db)):
+async def delete_business(business_id: str, db: AsyncSession = Depends(get_db)):
     """Delete a business"""
-    success = crud.delete_business(db=db, business_id=business_id)
+    success = await crud.delete_business(db=db, business_id=business_id)
     if not success:
         raise HTTPException(status_code=404, detail="Business not found")
     return {"message": "Business deleted successfully"}
 
 # Service endpoints
 @app.get("/api/v1/services", response_model=schemas.ServiceList, tags=["Services"])
-def read_services(
+async def read_services(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
     service_type: Optional[str] = Query(None, description="Filter by service type"),
     status: Optional[str] = Query(None, description="Filter by service status"),
     business_id: Optional[str] = Query(None, description="Filter by business ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    etag: str = Depends(check_etag)
 ):
     """Get list of services with optional filtering and pagination"""
-    services = crud.get_services(
-        db, skip=skip, limit=limit, service_type=service_type, 
-        status=status, business_id=business_id
-    )
+    # Convert each batch as it streams in so the ORM rows can be released
+    services = [
+        schemas.Service.model_validate(service)
+        async for service in await crud.get_services(
+            db, skip=skip, limit=limit, service_type=service_type, 
+            status=status, business_id=business_id
+        )
+    ]
     
     # Count total services with same filters
-    total = len(crud.get_services(db, service_type=service_type, status=status, business_id=business_id))
+    total = await crud.get_services_count(
+        db, service_type=service_type, status=status, business_id=business_id
+    )
     pages = math.ceil(total / limit) if limit > 0 else 0
     
-    return schemas.ServiceList(
+    return _json_response(_SERVICE_LIST_ADAPTER, schemas.ServiceList(
         services=services,
         total=total,
         page=(skip // limit) + 1 if limit > 0 else 1,
         size=limit,
         pages=pages
-    )
+    ), headers={"ETag": etag})
 
 @app.get("/api/v1/services/{service_id}", response_model=schemas.Service, tags=["Services"])
-def read_service(service_id: int, db: Session = Depends(get_db)):
+async def read_service(service_id: int, db: AsyncSession = Depends(get_db)):
     """Get a specific service by ID"""
-    service = crud.get_service(db, service_id=service_id)
+    service = await crud.get_service(db, service_id=service_id)
     if service is None:
         raise HTTPException(status_code=404, detail="Service not found")
     return service
 
 @app.get("/api/v1/businesses/{business_id}/services", response_model=List[schemas.Service], tags=["Services"])
-def read_business_services(business_id: str, db: Session = Depends(get_db)):
+async def read_business_services(business_id: str, db: AsyncSession = Depends(get_db)):
     """Get all services for a specific business"""
     # Check if business exists
-    business = crud.get_business(db, business_id=business_id)
+    business = await crud.get_business(db, business_id=business_id)
     if business is None:
         raise HTTPException(status_code=404, detail="Business not found")
     
-    return crud.get_services_by_business(db, business_id=business_id)
+    services = await crud.get_services_by_business(db, business_id=business_id)
+    return _json_response(_SERVICES_ADAPTER, _SERVICES_ADAPTER.validate_python(services, from_attributes=True))
 
 @app.post("/api/v1/businesses/{business_id}/services", response_model=schemas.Service, status_code=status.HTTP_201_CREATED, tags=["Services"])
-def create_service(business_id: str, service: schemas.ServiceCreate, db: Session = Depends(get_db)):
+async def create_service(business_id: str, service: schemas.ServiceCreate, db: AsyncSession = Depends(get_db)):
     """Create a new service for a business"""
     # Check if business exists
-    business = crud.get_business(db, business_id=business_id)
+    business = await crud.get_business(db, business_id=business_id)
     if business is None:
         raise HTTPException(status_code=404, detail="Business not found")
     
-    return crud.create_service(db=db, service=service, business_id=business_id)
+    return await crud.create_service(db=db, service=service, business_id=business_id)
 
 @app.put("/api/v1/services/{service_id}", response_model=schemas.Service, tags=["Services"])
-def update_service(service_id: int, service_update: dict, db: Session = Depends(get_db)):
+async def update_service(service_id: int, service_update: schemas.ServiceUpdate, db: AsyncSession = Depends(get_db)):
     """Update a service"""
-    service = crud.update_service(db=db, service_id=service_id, service_update=service_update)
+    # Moving a service needs the target business to exist
+    if service_update.business_id is not None:
+        business = await crud.get_business(db, business_id=service_update.business_id)
+        if business is None:
+            raise HTTPException(status_code=404, detail="Business not found")
+    
+    service = await crud.update_service(db=db, service_id=service_id, service_update=service_update)
     if service is None:
         raise HTTPException(status_code=404, detail="Service not found")
     return service
 
 @app.delete("/api/v1/services/{service_id}", tags=["Services"])
-def delete_service(service_id: int, db: Session = Depends(get_db)):
+async def delete_service(service_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a service"""
-    success = crud.delete_service(db=db, service_id=service_id)
+    success = await crud.delete_service(db=db, service_id=service_id)
     if not success:
         raise HTTPException(status_code=404, detail="Service not found")
     return {"message": "Service deleted successfully"}
 
 # Analytics endpoints
-@app.get("/api/v1/analytics/revenue", response_model=schemas.RevenueAnalytics, tags=["Analytics"])
-def get_revenue_analytics(db: Session = Depends(get_db)):
+@app.get("/api/v1/analytics/revenue", dependencies=[Depends(check_etag)], response_model=schemas.RevenueAnalytics, tags=["Analytics"])
+async def get_revenue_analytics(db: AsyncSession = Depends(get_db)):
     """Get revenue analytics"""
-    return crud.get_revenue_analytics(db)
+    return await crud.get_revenue_analytics(db)
 
-@app.get("/api/v1/analytics/customers", response_model=schemas.CustomerAnalytics, tags=["Analytics"])
-def get_customer_analytics(db: Session = Depends(get_db)):
+@app.get("/api/v1/analytics/customers", dependencies=[Depends(check_etag)], response_model=schemas.CustomerAnalytics, tags=["Analytics"])
+async def get_customer_analytics(db: AsyncSession = Depends(get_db)):
     """Get customer analytics"""
-    return crud.get_customer_analytics(db)
+    return await crud.get_customer_analytics(db)
 
-@app.get("/api/v1/analytics/summary", tags=["Analytics"])
-def get_analytics_summary(db: Session = Depends(get_db)):
+@app.get("/api/v1/analytics/summary", dependencies=[Depends(check_etag)], tags=["Analytics"])
+async def get_analytics_summary(db: AsyncSession = Depends(get_db)):
     """Get a summary of all analytics"""
-    revenue_analytics = crud.get_revenue_analytics(db)
-    customer_analytics = crud.get_customer_analytics(db)
-    
-    return {
-        "revenue": revenue_analytics,
-        "customers": customer_analytics,
-        "summary": {
-            "total_customers": customer_analytics["total_customers"],
-            "total_monthly_revenue": revenue_analytics["total_monthly_revenue"],
-            "average_revenue_per_customer": revenue_analytics["total_monthly_revenue"] / customer_analytics["total_customers"] if customer_analytics["total_customers"] > 0 else 0
-        }
-    }
+    return await crud.get_analytics_summary(db)
 
 # Utility endpoints
 @app.get("/api/v1/industries", tags=["Utilities"])
-def get_industries(db: Session = Depends(get_db)):
+async def get_industries(db: AsyncSession = Depends(get_db)):
     """Get list of all industries"""
-    industries = db.query(models.Business.industry).distinct().all()
-    return [industry[0] for industry in industries]
+    return await crud.get_industries(db)
 
 @app.get("/api/v1/provinces", tags=["Utilities"])
-def get_provinces(db: Session = Depends(get_db)):
+async def get_provinces(db: AsyncSession = Depends(get_db)):
     """Get list of all provinces"""
-    provinces = db.query(models.Business.province).distinct().all()
-    return [province[0] for province in provinces]
+    return await crud.get_provinces(db)
 
 @app.get("/api/v1/cities", tags=["Utilities"])
-def get_cities(province: Optional[str] = Query(None, description="Filter by province"), db: Session = Depends(get_db)):
+async def get_cities(province: Optional[str] = Query(None, description="Filter by province"), db: AsyncSession = Depends(get_db)):
     """Get list of all cities, optionally filtered by province"""
-    query = db.query(models.Business.city).distinct()
-    if province:
-        query = query.filter(models.Business.province == province)
-    cities = query.all()
-    return [city[0] for city in cities]
+    return await crud.get_cities(db, province=province)
 
 @app.get("/api/v1/service-types", tags=["Utilities"])
-def get_service_types(db: Session = Depends(get_db)):
+async def get_service_types(db: AsyncSession = Depends(get_db)):
     """Get list of all service types"""
-    service_types = db.query(models.Service.service_type).distinct().all()
-    return [service_type[0] for service_type in service_types]
+    return await crud.get_service_types(db)
+
+# Read-only endpoints that /api/v1/batch can combine, each called with the batch's session
+_BATCH_HANDLERS = {
+    "/health": lambda db: health_check(),
+    "/": lambda db: read_root(),
+    "/api/v1/industries": get_industries,
+    "/api/v1/provinces": get_provinces,
+    "/api/v1/service-types": get_service_types
+}
+
+@app.post("/api/v1/batch", response_model=schemas.BatchResponse, tags=["Utilities"])
+async def batch(batch_request: schemas.BatchRequest, db: AsyncSession = Depends(get_db)):
+    """Fetch several metadata endpoints in one round-trip, keyed by path"""
+    unknown = [path for path in batch_request.requests if path not in _BATCH_HANDLERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Paths not available in a batch: {', '.join(unknown)}")
+    
+    # Awaited one at a time since the handlers share the session
+    return {"results": {path: await _BATCH_HANDLERS[path](db) for path in batch_request.requests}}
 
 if __name__ == "__main__":
     import uvicorn
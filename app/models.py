@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON, Index, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -40,12 +40,29 @@ class Business(Base):
     
     # Relationship to services
     services = relationship("Service", back_populates="business", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Match the combined filters used by /cities and the businesses list
+        Index("ix_biz_prov_city", "province", "city"),
+        Index("ix_biz_ind_prov_status", "industry", "province", "account_status"),
+        # Sort key for keyset pagination of the businesses list
+        Index("ix_biz_company_name_id", "company_name", "id"),
+        # Trigram indexes let the ILIKE '%term%' search use an index (PostgreSQL only)
+        *(
+            Index(
+                f"ix_biz_{column}_trgm", column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"}
+            ).ddl_if(dialect="postgresql")
+            for column in ("company_name", "email", "phone")
+        ),
+    )
 
 class Service(Base):
     __tablename__ = "services"
     
     id = Column(Integer, primary_key=True, index=True)
-    business_id = Column(String, ForeignKey("businesses.id"))
+    business_id = Column(String, ForeignKey("businesses.id"), index=True)
     service_type = Column(String, index=True)
     service_name = Column(String)
     monthly_price = Column(Float)
@@ -59,4 +76,50 @@ class Service(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationship to business
-    business = relationship("Business", back_populates="services") 
\ No newline at end of file
+    business = relationship("Business", back_populates="services")
+    
+    __table_args__ = (
+        # Covers the combined filters used by the services list and count
+        Index("ix_services_filters", "service_type", "status", "business_id"),
+    )
+
+class DataVersion(Base):
+    """Single-row counter bumped in the same transaction as every write
+    
+    The ETags and the cross-worker cache invalidation are keyed on it. Timestamps
+    can't do that job: they have one-second resolution on SQLite, and on
+    PostgreSQL now() is the transaction start rather than the commit.
+    """
+    __tablename__ = "data_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# Seed the counter's only row whenever its table is created
+event.listen(
+    DataVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO data_version (id, version) VALUES (1, 0)")
+)
+
+# The trigram indexes above need the pg_trgm extension
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+def create_schema(bind):
+    """Create missing tables, then any model index an existing table lacks
+    
+    create_all only creates indexes together with a new table, so databases
+    created before an index was added never get it from create_all alone.
+    Each index is checked first, so reruns are no-ops, and PostgreSQL-only
+    indexes are skipped elsewhere. create_all has already run the pg_trgm
+    hook by the time the trigram indexes are created.
+    """
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
\ No newline at end of file
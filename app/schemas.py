@@ -1,6 +1,16 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr, field_validator
+from typing import Annotated, List, Optional, Dict, Any
+from datetime import datetime, timezone
+
+def _naive_utc(value: datetime) -> datetime:
+    """Convert an aware datetime to naive UTC; naive values are taken as UTC already"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+# The contract and customer dates are timezone-less DateTime columns, which
+# asyncpg won't bind aware values (e.g. Salesforce "...Z" timestamps) to
+NaiveUTCDatetime = Annotated[datetime, AfterValidator(_naive_utc)]
 
 # Service schemas
 class ServiceBase(BaseModel):
@@ -8,21 +18,39 @@ class ServiceBase(BaseModel):
     service_name: str
     monthly_price: float
     details: Dict[str, Any]
-    contract_start: datetime
-    contract_end: datetime
+    contract_start: NaiveUTCDatetime
+    contract_end: NaiveUTCDatetime
     status: str
 
 class ServiceCreate(ServiceBase):
     pass
 
+class ServiceUpdate(BaseModel):
+    business_id: Optional[str] = None
+    service_type: Optional[str] = None
+    service_name: Optional[str] = None
+    monthly_price: Optional[float] = None
+    details: Optional[Dict[str, Any]] = None
+    contract_start: Optional[NaiveUTCDatetime] = None
+    contract_end: Optional[NaiveUTCDatetime] = None
+    status: Optional[str] = None
+    
+    # Fields may be left out of an update, but an explicit null would be written
+    # to a column every Service response requires
+    @field_validator("*")
+    @classmethod
+    def reject_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
 class Service(ServiceBase):
     id: int
     business_id: str
     created_at: datetime
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Business schemas
 class BusinessBase(BaseModel):
@@ -39,11 +67,11 @@ class BusinessBase(BaseModel):
     phone: str
     email: str
     website: str
-    bell_customer_since: datetime
+    bell_customer_since: NaiveUTCDatetime
     account_manager: str
     payment_method: str
     account_status: str
-    last_contact_date: datetime
+    last_contact_date: NaiveUTCDatetime
     notes: str
 
 class BusinessCreate(BusinessBase):
@@ -63,11 +91,11 @@ class BusinessUpdate(BaseModel):
     phone: Optional[str] = None
     email: Optional[str] = None
     website: Optional[str] = None
-    bell_customer_since: Optional[datetime] = None
+    bell_customer_since: Optional[NaiveUTCDatetime] = None
     account_manager: Optional[str] = None
     payment_method: Optional[str] = None
     account_status: Optional[str] = None
-    last_contact_date: Optional[datetime] = None
+    last_contact_date: Optional[NaiveUTCDatetime] = None
     notes: Optional[str] = None
 
 class Business(BusinessBase):
@@ -77,16 +105,16 @@ class Business(BusinessBase):
     updated_at: Optional[datetime] = None
     services: List[Service] = []
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Response schemas
 class BusinessList(BaseModel):
     businesses: List[Business]
     total: int
-    page: int
+    page: Optional[int] = None  # None for cursor (after=...) pages
     size: int
     pages: int
+    next_cursor: Optional[str] = None
 
 class ServiceList(BaseModel):
     services: List[Service]
@@ -108,4 +136,11 @@ class CustomerAnalytics(BaseModel):
     customers_by_industry: Dict[str, int]
     customers_by_province: Dict[str, int]
     customers_by_status: Dict[str, int]
-    average_services_per_customer: float 
\ No newline at end of file
+    average_services_per_customer: float 
+
+# Batch schemas
+class BatchRequest(BaseModel):
+    requests: List[str]
+
+class BatchResponse(BaseModel):
+    results: Dict[str, Any]
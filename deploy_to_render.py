@@ -28,12 +28,12 @@ def setup_database():
         # Import database modules
         sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
         from app.database import engine
-        from app.models import Base
+        from app.models import create_schema
         
-        # Create tables
-        print("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created")
+        # Create tables, and add indexes introduced since an existing database was created
+        print("Creating database tables and indexes...")
+        create_schema(engine)
+        print("✅ Database tables and indexes created")
         
         # Load data if this is a fresh deployment
         if check_render_env():
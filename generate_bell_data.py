@@ -4,9 +4,12 @@ Bell Canada B2B Telecommunications Dataset Generator
 Creates realistic data for Canadian businesses using Bell services
 """
 
-import json
+import orjson
+import os
 import random
-from datetime import datetime, timedelta
+from multiprocessing import Pool
+import numpy as np
+from datetime import date, datetime
 import csv
 
 # Canadian cities and provinces for realistic addresses
@@ -34,6 +37,25 @@ CANADIAN_CITIES = [
     {"city": "Iqaluit", "province": "NU", "postal_code_prefix": "X"}
 ]
 
+# Address and phone components
+STREET_NAMES = (
+    "Main", "King", "Queen", "Broadway", "Central", "First", "Second",
+    "Oak", "Maple", "Pine", "Cedar", "Elm", "Birch", "Spruce", "Willow",
+    "Victoria", "Albert", "George", "Edward", "Charles", "William",
+    "John", "Robert", "Michael", "David", "James", "Thomas", "Richard",
+    "University", "College", "School", "Church", "Market", "Commerce",
+    "Business", "Industrial", "Technology", "Innovation", "Progress"
+)
+STREET_TYPES = ("Street", "Avenue", "Road", "Boulevard", "Drive", "Way", "Lane")
+POSTAL_CODE_LETTERS = "ABCEGHJKLMNPRSTVWXYZ"
+# Each area code listed once so they are drawn with equal weight
+AREA_CODES = (
+    "416", "647", "437", "905", "289", "365", "343", "613", "819", "873",
+    "450", "579", "354", "581", "418", "514", "438", "604", "778", "236",
+    "672", "250", "403", "587", "825", "780", "204", "431", "506", "709",
+    "782", "902", "306", "639", "474", "867"
+)
+
 # Business types and industries
 BUSINESS_TYPES = [
     "Technology", "Healthcare", "Finance", "Manufacturing", "Retail", 
@@ -41,6 +63,24 @@ BUSINESS_TYPES = [
     "Transportation", "Hospitality", "Media", "Non-Profit", "Government"
 ]
 
+# Business attribute choices
+EMPLOYEE_COUNTS = [1, 2, 3, 5, 10, 15, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+ANNUAL_REVENUES = [50000, 100000, 250000, 500000, 1000000, 2500000, 5000000, 10000000, 25000000, 50000000, 100000000]
+PAYMENT_METHODS = ["Credit Card", "Bank Transfer", "Invoice", "Auto-Pay"]
+ACCOUNT_STATUSES = ["Active", "Active", "Active", "Past Due", "Suspended", "Cancelled"]
+NOTES = [
+    "Excellent customer, always pays on time",
+    "Interested in upgrading services",
+    "Has been a customer for many years",
+    "Recently expanded business",
+    "May need additional services",
+    "Contacted about new offerings",
+    "Satisfied with current services",
+    "Potential for upselling",
+    "Regular maintenance customer",
+    "High-value customer"
+]
+
 # Bell Canada services
 BELL_SERVICES = {
     "Internet": {
@@ -80,6 +120,45 @@ BELL_SERVICES = {
     }
 }
 
+# Chance a business subscribes to each service type, and whether it is billed per line
+SERVICE_CONFIG = [
+    ("Internet", 0.95, False),  # Most businesses have internet
+    ("Phone", 0.85, False),     # Many businesses have phone service
+    ("Mobile", 0.60, True),     # Some businesses have mobile plans, with multiple lines
+    ("TV", 0.40, False),
+    ("Cloud", 0.35, False),
+    ("Security", 0.30, False)
+]
+
+# (plan name, plan data) pairs per service type, built once so a single draw returns both
+_SERVICES_FLAT = {service_type: tuple(plans.items()) for service_type, plans in BELL_SERVICES.items()}
+
+# CSV columns: the business fields plus up to one of each service type, sorted
+CSV_FIELDS = sorted([
+    "id", "company_name", "industry", "employee_count", "annual_revenue",
+    "street_number", "street_name", "city", "province", "postal_code", "country",
+    "phone", "email", "website", "bell_customer_since", "account_manager",
+    "total_monthly_revenue", "payment_method", "account_status",
+    "last_contact_date", "notes"
+] + [
+    f"service_{i}_{key}"
+    for i in range(1, len(BELL_SERVICES) + 1)
+    for key in ("type", "name", "price", "status")
+])
+
+# All generated dates are offsets from a single "now"
+_NOW = datetime.now()
+_NOW_ORD = _NOW.toordinal()
+
+def _rand_date(lo, hi, _randint=random.randint):
+    """Random YYYY-MM-DD date between lo and hi days from today"""
+    return date.fromordinal(_NOW_ORD + _randint(lo, hi)).isoformat()
+
+# Businesses are generated in chunks of this size; on multi-core machines, datasets
+# of at least PARALLEL_THRESHOLD businesses spread the chunks across worker processes
+GENERATE_CHUNK_SIZE = 2000
+PARALLEL_THRESHOLD = 10000
+
 # Company name components
 COMPANY_PREFIXES = [
     "Advanced", "Canadian", "Global", "Premier", "Elite", "Professional",
@@ -103,280 +182,244 @@ COMPANY_SUFFIXES = [
     "International", "Canada", "North", "West", "East", "Central"
 ]
 
-def generate_company_name():
+# Characters dropped when turning a company name into a domain
+_SLUG_STRIP = str.maketrans("", "", " .,")
+
+def generate_company_name(_choice=random.choice, _random=random.random):
     """Generate a realistic Canadian company name"""
-    prefix = random.choice(COMPANY_PREFIXES)
-    main = random.choice(COMPANY_MAIN_NAMES)
-    suffix = random.choice(COMPANY_SUFFIXES)
-    
-    # Sometimes skip prefix or suffix for variety
-    if random.random() < 0.3:
-        return f"{main} {suffix}"
-    elif random.random() < 0.2:
-        return f"{prefix} {main}"
+    # Sometimes skip prefix or suffix for variety: 30% "main suffix",
+    # 14% "prefix main", 56% all three. One roll picks the shape, then
+    # only the parts that shape needs are drawn.
+    shape = _random()
+    main = _choice(COMPANY_MAIN_NAMES)
+    if shape < 0.3:
+        return f"{main} {_choice(COMPANY_SUFFIXES)}"
+    elif shape < 0.44:
+        return f"{_choice(COMPANY_PREFIXES)} {main}"
     else:
-        return f"{prefix} {main} {suffix}"
+        return f"{_choice(COMPANY_PREFIXES)} {main} {_choice(COMPANY_SUFFIXES)}"
 
-def generate_address():
-    """Generate a realistic Canadian address"""
-    city_data = random.choice(CANADIAN_CITIES)
-    
-    # Generate street number
-    street_number = random.randint(1, 9999)
-    
-    # Generate street name
-    street_names = [
-        "Main", "King", "Queen", "Broadway", "Central", "First", "Second",
-        "Oak", "Maple", "Pine", "Cedar", "Elm", "Birch", "Spruce", "Willow",
-        "Victoria", "Albert", "George", "Edward", "Charles", "William",
-        "John", "Robert", "Michael", "David", "James", "Thomas", "Richard",
-        "University", "College", "School", "Church", "Market", "Commerce",
-        "Business", "Industrial", "Technology", "Innovation", "Progress"
-    ]
+def generate_address(city_data=None, street=None, _choice=random.choice, _randint=random.randint, _alpha=POSTAL_CODE_LETTERS):
+    """Generate a realistic Canadian address
     
-    street_name = random.choice(street_names)
-    street_types = ["Street", "Avenue", "Road", "Boulevard", "Drive", "Way", "Lane"]
-    street_type = random.choice(street_types)
+    ``city_data`` and ``street`` (e.g. "King Street") may be supplied pre-drawn.
+    """
+    if city_data is None:
+        city_data = _choice(CANADIAN_CITIES)
+    if street is None:
+        street = f"{_choice(STREET_NAMES)} {_choice(STREET_TYPES)}"
+    street_number = _randint(1, 9999)
     
     # Generate postal code
-    postal_code = f"{city_data['postal_code_prefix']}{random.randint(1, 9)}{random.choice('ABCEGHJKLMNPRSTVWXYZ')} {random.randint(1, 9)}{random.choice('ABCEGHJKLMNPRSTVWXYZ')}{random.randint(1, 9)}"
+    postal_code = f"{city_data['postal_code_prefix']}{_randint(1, 9)}{_choice(_alpha)} {_randint(1, 9)}{_choice(_alpha)}{_randint(1, 9)}"
     
     return {
         "street_number": street_number,
-        "street_name": f"{street_name} {street_type}",
+        "street_name": street,
         "city": city_data["city"],
         "province": city_data["province"],
         "postal_code": postal_code,
         "country": "Canada"
     }
 
-def generate_phone_number():
+def generate_phone_number(_choice=random.choice, _randint=random.randint, _area_codes=AREA_CODES):
     """Generate a realistic Canadian phone number"""
-    area_codes = ["416", "647", "437", "905", "289", "365", "343", "613", "819", "873", "450", "579", "354", "581", "418", "581", "514", "438", "450", "579", "354", "581", "418", "581", "604", "778", "236", "672", "250", "778", "236", "672", "403", "587", "825", "780", "825", "587", "403", "204", "431", "506", "709", "782", "902", "782", "709", "506", "431", "204", "306", "639", "474", "306", "639", "474", "867", "867"]
-    
-    area_code = random.choice(area_codes)
-    prefix = random.randint(200, 999)
-    line_number = random.randint(1000, 9999)
-    
-    return f"+1-{area_code}-{prefix}-{line_number}"
+    return f"+1-{_choice(_area_codes)}-{_randint(200, 999)}-{_randint(1000, 9999)}"
 
-def generate_bell_services():
-    """Generate realistic Bell services for a business"""
-    services = []
-    
-    # Most businesses have internet
-    if random.random() < 0.95:
-        service_type = "Internet"
-        service_name = random.choice(list(BELL_SERVICES[service_type].keys()))
-        service_data = BELL_SERVICES[service_type][service_name]
-        
-        services.append({
-            "service_type": service_type,
-            "service_name": service_name,
-            "monthly_price": service_data["price"],
-            "details": service_data,
-            "contract_start": (datetime.now() - timedelta(days=random.randint(30, 1095))).strftime("%Y-%m-%d"),
-            "contract_end": (datetime.now() + timedelta(days=random.randint(365, 1825))).strftime("%Y-%m-%d"),
-            "status": random.choice(["Active", "Active", "Active", "Pending", "Suspended"])
-        })
-    
-    # Many businesses have phone service
-    if random.random() < 0.85:
-        service_type = "Phone"
-        service_name = random.choice(list(BELL_SERVICES[service_type].keys()))
-        service_data = BELL_SERVICES[service_type][service_name]
-        
-        services.append({
-            "service_type": service_type,
-            "service_name": service_name,
-            "monthly_price": service_data["price"],
-            "details": service_data,
-            "contract_start": (datetime.now() - timedelta(days=random.randint(30, 1095))).strftime("%Y-%m-%d"),
-            "contract_end": (datetime.now() + timedelta(days=random.randint(365, 1825))).strftime("%Y-%m-%d"),
-            "status": random.choice(["Active", "Active", "Active", "Pending", "Suspended"])
-        })
-    
-    # Some businesses have mobile plans
-    if random.random() < 0.60:
-        service_type = "Mobile"
-        service_name = random.choice(list(BELL_SERVICES[service_type].keys()))
-        service_data = BELL_SERVICES[service_type][service_name]
-        
-        # Generate multiple lines for mobile
-        num_lines = random.randint(1, 10)
-        
-        services.append({
-            "service_type": service_type,
-            "service_name": service_name,
-            "monthly_price": service_data["price"] * num_lines,
-            "details": {**service_data, "number_of_lines": num_lines},
-            "contract_start": (datetime.now() - timedelta(days=random.randint(30, 1095))).strftime("%Y-%m-%d"),
-            "contract_end": (datetime.now() + timedelta(days=random.randint(365, 1825))).strftime("%Y-%m-%d"),
-            "status": random.choice(["Active", "Active", "Active", "Pending", "Suspended"])
-        })
+def generate_bell_services(draws=None, _choice=random.choice, _randint=random.randint, _random=random.random):
+    """Generate realistic Bell services for a business
     
-    # Some businesses have TV
-    if random.random() < 0.40:
-        service_type = "TV"
-        service_name = random.choice(list(BELL_SERVICES[service_type].keys()))
-        service_data = BELL_SERVICES[service_type][service_name]
-        
-        services.append({
-            "service_type": service_type,
-            "service_name": service_name,
-            "monthly_price": service_data["price"],
-            "details": service_data,
-            "contract_start": (datetime.now() - timedelta(days=random.randint(30, 1095))).strftime("%Y-%m-%d"),
-            "contract_end": (datetime.now() + timedelta(days=random.randint(365, 1825))).strftime("%Y-%m-%d"),
-            "status": random.choice(["Active", "Active", "Active", "Pending", "Suspended"])
-        })
-    
-    # Some businesses have cloud services
-    if random.random() < 0.35:
-        service_type = "Cloud"
-        service_name = random.choice(list(BELL_SERVICES[service_type].keys()))
-        service_data = BELL_SERVICES[service_type][service_name]
-        
-        services.append({
-            "service_type": service_type,
-            "service_name": service_name,
-            "monthly_price": service_data["price"],
-            "details": service_data,
-            "contract_start": (datetime.now() - timedelta(days=random.randint(30, 1095))).strftime("%Y-%m-%d"),
-            "contract_end": (datetime.now() + timedelta(days=random.randint(365, 1825))).strftime("%Y-%m-%d"),
-            "status": random.choice(["Active", "Active", "Active", "Pending", "Suspended"])
-        })
+    ``draws`` optionally supplies the subscription roll for each SERVICE_CONFIG entry.
+    """
+    services = []
+    if draws is None:
+        draws = [_random() for _ in SERVICE_CONFIG]
     
-    # Some businesses have security services
-    if random.random() < 0.30:
-        service_type = "Security"
-        service_name = random.choice(list(BELL_SERVICES[service_type].keys()))
-        service_data = BELL_SERVICES[service_type][service_name]
-        
-        services.append({
-            "service_type": service_type,
-            "service_name": service_name,
-            "monthly_price": service_data["price"],
-            "details": service_data,
-            "contract_start": (datetime.now() - timedelta(days=random.randint(30, 1095))).strftime("%Y-%m-%d"),
-            "contract_end": (datetime.now() + timedelta(days=random.randint(365, 1825))).strftime("%Y-%m-%d"),
-            "status": random.choice(["Active", "Active", "Active", "Pending", "Suspended"])
-        })
+    for (service_type, probability, per_line), draw in zip(SERVICE_CONFIG, draws):
+        if draw < probability:
+            service_name, service_data = _choice(_SERVICES_FLAT[service_type])
+            monthly_price = service_data["price"]
+            details = service_data
+            
+            # Generate multiple lines for mobile
+            if per_line:
+                num_lines = _randint(1, 10)
+                monthly_price *= num_lines
+                details = {**service_data, "number_of_lines": num_lines}
+            
+            services.append({
+                "service_type": service_type,
+                "service_name": service_name,
+                "monthly_price": monthly_price,
+                "details": details,
+                "contract_start": _rand_date(-1095, -30, _randint),
+                "contract_end": _rand_date(365, 1825, _randint),
+                "status": _choice(["Active", "Active", "Active", "Pending", "Suspended"])
+            })
     
     return services
 
-def generate_business_data(num_businesses=1000):
-    """Generate comprehensive business data"""
+def _generate_chunk(task):
+    """Generate businesses start+1 .. start+count from their own seed"""
+    start, count, seed = task
+    # A private Random per chunk, so generating never reseeds the global
+    # random module (callers' own random.seed() state is left alone)
+    rng = random.Random(seed)
     businesses = []
     
-    for i in range(num_businesses):
-        address = generate_address()
-        services = generate_bell_services()
+    # Build the drawn attributes column by column for the whole chunk, with
+    # the formatting vectorized too, then zip the columns into records
+    n = count
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    today = np.datetime64(_NOW.date(), "D")
+    columns = zip(
+        np_rng.choice(BUSINESS_TYPES, n).tolist(),
+        np_rng.choice(EMPLOYEE_COUNTS, n).tolist(),
+        np_rng.choice(ANNUAL_REVENUES, n).tolist(),
+        (today + np_rng.integers(-3650, -364, n)).astype(str).tolist(),
+        np.char.add("Manager ", np_rng.integers(1, 51, n).astype(str)).tolist(),
+        np_rng.choice(PAYMENT_METHODS, n).tolist(),
+        np_rng.choice(ACCOUNT_STATUSES, n).tolist(),
+        (today + np_rng.integers(-90, 0, n)).astype(str).tolist(),
+        np_rng.choice(NOTES, n).tolist(),
+        np_rng.random((n, len(SERVICE_CONFIG))).tolist(),
+        # Address parts are drawn with one rng.choices call per field
+        rng.choices(CANADIAN_CITIES, k=n),
+        [
+            f"{street_name} {street_type}"
+            for street_name, street_type in zip(
+                rng.choices(STREET_NAMES, k=n), rng.choices(STREET_TYPES, k=n)
+            )
+        ]
+    )
+    
+    for i, (
+        industry, employee_count, annual_revenue, customer_since, account_manager,
+        payment_method, account_status, last_contact, note, service_draws,
+        city_data, street
+    ) in enumerate(columns, start + 1):
+        address = generate_address(city_data, street, _choice=rng.choice, _randint=rng.randint)
+        services = generate_bell_services(service_draws, _choice=rng.choice, _randint=rng.randint)
         
         # Calculate total monthly revenue
         total_monthly_revenue = sum(service["monthly_price"] for service in services)
         
+        # Email and website domains are derived from the company's own name
+        company_name = generate_company_name(_choice=rng.choice, _random=rng.random)
+        slug = company_name.lower().translate(_SLUG_STRIP)
+        
         business = {
-            "id": f"BELL-{str(i+1).zfill(6)}",
-            "company_name": generate_company_name(),
-            "industry": random.choice(BUSINESS_TYPES),
-            "employee_count": random.choice([1, 2, 3, 5, 10, 15, 25, 50, 100, 250, 500, 1000, 2500, 5000]),
-            "annual_revenue": random.choice([50000, 100000, 250000, 500000, 1000000, 2500000, 5000000, 10000000, 25000000, 50000000, 100000000]),
+            "id": f"BELL-{i:06d}",
+            "company_name": company_name,
+            "industry": industry,
+            "employee_count": employee_count,
+            "annual_revenue": annual_revenue,
             "address": address,
-            "phone": generate_phone_number(),
-            "email": f"info@{generate_company_name().lower().replace(' ', '').replace('.', '').replace(',', '')}.ca",
-            "website": f"www.{generate_company_name().lower().replace(' ', '').replace('.', '').replace(',', '')}.ca",
-            "bell_customer_since": (datetime.now() - timedelta(days=random.randint(365, 3650))).strftime("%Y-%m-%d"),
-            "account_manager": f"Manager {random.randint(1, 50)}",
+            "phone": generate_phone_number(_choice=rng.choice, _randint=rng.randint),
+            "email": f"info@{slug}.ca",
+            "website": f"www.{slug}.ca",
+            "bell_customer_since": customer_since,
+            "account_manager": account_manager,
             "services": services,
             "total_monthly_revenue": round(total_monthly_revenue, 2),
-            "payment_method": random.choice(["Credit Card", "Bank Transfer", "Invoice", "Auto-Pay"]),
-            "account_status": random.choice(["Active", "Active", "Active", "Past Due", "Suspended", "Cancelled"]),
-            "last_contact_date": (datetime.now() - timedelta(days=random.randint(1, 90))).strftime("%Y-%m-%d"),
-            "notes": random.choice([
-                "Excellent customer, always pays on time",
-                "Interested in upgrading services",
-                "Has been a customer for many years",
-                "Recently expanded business",
-                "May need additional services",
-                "Contacted about new offerings",
-                "Satisfied with current services",
-                "Potential for upselling",
-                "Regular maintenance customer",
-                "High-value customer"
-            ])
+            "payment_method": payment_method,
+            "account_status": account_status,
+            "last_contact_date": last_contact,
+            "notes": note
         }
         
         businesses.append(business)
     
     return businesses
 
+def iter_business_data(num_businesses=1000):
+    """Yield generated businesses, holding at most one chunk in memory
+    
+    Businesses are generated in independent chunks, spread across worker
+    processes for large datasets. Chunk seeds are drawn from `random` up
+    front, so random.seed() still makes a run reproducible.
+    """
+    tasks = [
+        (start, min(GENERATE_CHUNK_SIZE, num_businesses - start), random.getrandbits(64))
+        for start in range(0, num_businesses, GENERATE_CHUNK_SIZE)
+    ]
+    
+    if num_businesses < PARALLEL_THRESHOLD or (os.cpu_count() or 1) < 2:
+        for task in tasks:
+            yield from _generate_chunk(task)
+    else:
+        with Pool() as pool:
+            for chunk in pool.imap(_generate_chunk, tasks):
+                yield from chunk
+
+def generate_business_data(num_businesses=1000):
+    """Generate comprehensive business data"""
+    return list(iter_business_data(num_businesses))
+
 def save_to_json(data, filename):
-    """Save data to JSON file"""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """Save data to JSON file
+    
+    ``data`` may be any iterable of businesses, e.g. iter_business_data();
+    records are serialized and written one at a time.
+    """
+    # orjson serializes in C and returns UTF-8 bytes, so write in binary mode.
+    # Each record is indented one level to match a whole-list OPT_INDENT_2 dump.
+    with open(filename, 'wb') as f:
+        separator = b"[\n  "
+        for business in data:
+            f.write(separator)
+            f.write(orjson.dumps(business, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n  "))
+            separator = b",\n  "
+        f.write(b"[]" if separator == b"[\n  " else b"\n]")
     print(f"Data saved to {filename}")
 
+def _csv_row(business):
+    """Flatten a business and its services into a single CSV row"""
+    return {
+        "id": business["id"],
+        "company_name": business["company_name"],
+        "industry": business["industry"],
+        "employee_count": business["employee_count"],
+        "annual_revenue": business["annual_revenue"],
+        "street_number": business["address"]["street_number"],
+        "street_name": business["address"]["street_name"],
+        "city": business["address"]["city"],
+        "province": business["address"]["province"],
+        "postal_code": business["address"]["postal_code"],
+        "country": business["address"]["country"],
+        "phone": business["phone"],
+        "email": business["email"],
+        "website": business["website"],
+        "bell_customer_since": business["bell_customer_since"],
+        "account_manager": business["account_manager"],
+        "total_monthly_revenue": business["total_monthly_revenue"],
+        "payment_method": business["payment_method"],
+        "account_status": business["account_status"],
+        "last_contact_date": business["last_contact_date"],
+        "notes": business["notes"],
+        # Add service information
+        **{
+            f"service_{i+1}_{key}": service[field]
+            for i, service in enumerate(business["services"])
+            for key, field in (
+                ("type", "service_type"),
+                ("name", "service_name"),
+                ("price", "monthly_price"),
+                ("status", "status")
+            )
+        }
+    }
+
 def save_to_csv(data, filename):
     """Save data to CSV file"""
     if not data:
         return
     
-    # First pass: determine all possible field names
-    all_fieldnames = set()
-    flattened_data = []
-    
-    for business in data:
-        base_record = {
-            "id": business["id"],
-            "company_name": business["company_name"],
-            "industry": business["industry"],
-            "employee_count": business["employee_count"],
-            "annual_revenue": business["annual_revenue"],
-            "street_number": business["address"]["street_number"],
-            "street_name": business["address"]["street_name"],
-            "city": business["address"]["city"],
-            "province": business["address"]["province"],
-            "postal_code": business["address"]["postal_code"],
-            "country": business["address"]["country"],
-            "phone": business["phone"],
-            "email": business["email"],
-            "website": business["website"],
-            "bell_customer_since": business["bell_customer_since"],
-            "account_manager": business["account_manager"],
-            "total_monthly_revenue": business["total_monthly_revenue"],
-            "payment_method": business["payment_method"],
-            "account_status": business["account_status"],
-            "last_contact_date": business["last_contact_date"],
-            "notes": business["notes"]
-        }
-        
-        # Add service information
-        for i, service in enumerate(business["services"]):
-            base_record[f"service_{i+1}_type"] = service["service_type"]
-            base_record[f"service_{i+1}_name"] = service["service_name"]
-            base_record[f"service_{i+1}_price"] = service["monthly_price"]
-            base_record[f"service_{i+1}_status"] = service["status"]
-        
-        # Add all field names to the set
-        all_fieldnames.update(base_record.keys())
-        flattened_data.append(base_record)
-    
-    # Convert set to sorted list for consistent ordering
-    fieldnames = sorted(list(all_fieldnames))
-    
-    # Ensure all records have all fields (fill missing with empty string)
-    for record in flattened_data:
-        for field in fieldnames:
-            if field not in record:
-                record[field] = ""
-    
-    # Write to CSV
+    # Rows are streamed straight to the writer; DictWriter leaves missing service columns empty
     with open(filename, 'w', newline='', encoding='utf-8') as f:
-        if flattened_data:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(flattened_data)
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, restval="", extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(_csv_row(business) for business in data)
     
     print(f"Data saved to {filename}")
 
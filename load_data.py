@@ -4,17 +4,33 @@ Data loader for Bell Canada B2B API
 Loads generated JSON data into the database
 """
 
+import csv
+import io
+import ijson
 import json
 import sys
 import os
 from datetime import datetime
+from sqlalchemy import event, func
 from sqlalchemy.orm import Session
 
 # Add the app directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
 from app.database import SessionLocal, engine
-from app.models import Base, Business, Service
+from app.models import Base, Business, DataVersion, Service
+
+# Businesses are inserted in chunks of this size as the JSON file streams in
+LOAD_CHUNK_SIZE = 5000
+
+# SQLite: skip fsyncs and keep the rollback journal in memory while loading
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _bulk_load_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.close()
 
 def parse_date(date_string):
     """Parse date string to datetime object"""
@@ -23,99 +39,132 @@ def parse_date(date_string):
     except ValueError:
         return datetime.now()
 
+def _business_row(business_data):
+    """Map a business record from the JSON file to a businesses row"""
+    return {
+        "id": business_data["id"],
+        "company_name": business_data["company_name"],
+        "industry": business_data["industry"],
+        "employee_count": business_data["employee_count"],
+        "annual_revenue": business_data["annual_revenue"],
+        "street_number": business_data["address"]["street_number"],
+        "street_name": business_data["address"]["street_name"],
+        "city": business_data["address"]["city"],
+        "province": business_data["address"]["province"],
+        "postal_code": business_data["address"]["postal_code"],
+        "country": business_data["address"]["country"],
+        "phone": business_data["phone"],
+        "email": business_data["email"],
+        "website": business_data["website"],
+        "bell_customer_since": parse_date(business_data["bell_customer_since"]),
+        "account_manager": business_data["account_manager"],
+        "total_monthly_revenue": business_data["total_monthly_revenue"],
+        "payment_method": business_data["payment_method"],
+        "account_status": business_data["account_status"],
+        "last_contact_date": parse_date(business_data["last_contact_date"]),
+        "notes": business_data["notes"]
+    }
+
+def _service_rows(business_data):
+    """Map a business record's services to services rows"""
+    return [
+        {
+            "business_id": business_data["id"],
+            "service_type": service_data["service_type"],
+            "service_name": service_data["service_name"],
+            "monthly_price": service_data["monthly_price"],
+            "details": service_data["details"],
+            "contract_start": parse_date(service_data["contract_start"]),
+            "contract_end": parse_date(service_data["contract_end"]),
+            "status": service_data["status"]
+        }
+        for service_data in business_data["services"]
+    ]
+
+def _copy_value(value):
+    """Format a row value for COPY ... WITH (FORMAT CSV, NULL '\\N')"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, dict):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _copy_rows(conn, table, rows):
+    """Bulk load rows into a PostgreSQL table with COPY FROM STDIN"""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    
+    with conn.connection.dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')",
+            buffer
+        )
+
+def _insert_rows(conn, business_rows, service_rows):
+    """Insert one chunk of rows: COPY on PostgreSQL (psycopg2), Core executemany elsewhere"""
+    use_copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+    for table, rows in ((Business.__table__, business_rows), (Service.__table__, service_rows)):
+        if not rows:
+            continue
+        if use_copy:
+            _copy_rows(conn, table, rows)
+        else:
+            conn.execute(table.insert(), rows)
+
 def load_data_from_json(json_file_path: str):
     """Load data from JSON file into database"""
     print(f"Loading data from {json_file_path}...")
     
-    # Read JSON file
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Create database session
-    db = SessionLocal()
-    
     try:
-        # Clear existing data
-        print("Clearing existing data...")
-        db.query(Service).delete()
-        db.query(Business).delete()
-        db.commit()
-        
-        # Load businesses
-        print(f"Loading {len(data)} businesses...")
-        for i, business_data in enumerate(data):
-            if i % 100 == 0:
-                print(f"Processed {i} businesses...")
-            
-            # Create business object
-            business = Business(
-                id=business_data["id"],
-                company_name=business_data["company_name"],
-                industry=business_data["industry"],
-                employee_count=business_data["employee_count"],
-                annual_revenue=business_data["annual_revenue"],
-                street_number=business_data["address"]["street_number"],
-                street_name=business_data["address"]["street_name"],
-                city=business_data["address"]["city"],
-                province=business_data["address"]["province"],
-                postal_code=business_data["address"]["postal_code"],
-                country=business_data["address"]["country"],
-                phone=business_data["phone"],
-                email=business_data["email"],
-                website=business_data["website"],
-                bell_customer_since=parse_date(business_data["bell_customer_since"]),
-                account_manager=business_data["account_manager"],
-                total_monthly_revenue=business_data["total_monthly_revenue"],
-                payment_method=business_data["payment_method"],
-                account_status=business_data["account_status"],
-                last_contact_date=parse_date(business_data["last_contact_date"]),
-                notes=business_data["notes"]
-            )
+        # Replace the data in a single transaction directly on a connection,
+        # bypassing the ORM session entirely. Businesses are streamed from the
+        # file and inserted in chunks, so only one chunk is held in memory.
+        with open(json_file_path, 'rb') as f, engine.begin() as conn:
+            print("Clearing existing data...")
+            conn.execute(Service.__table__.delete())
+            conn.execute(Business.__table__.delete())
             
-            db.add(business)
-            db.flush()  # Get the ID without committing
+            print("Loading businesses...")
+            loaded = 0
+            business_rows, service_rows = [], []
+            for business_data in ijson.items(f, "item", use_float=True):
+                business_rows.append(_business_row(business_data))
+                service_rows.extend(_service_rows(business_data))
+                if len(business_rows) >= LOAD_CHUNK_SIZE:
+                    _insert_rows(conn, business_rows, service_rows)
+                    loaded += len(business_rows)
+                    business_rows, service_rows = [], []
             
-            # Create services for this business
-            for service_data in business_data["services"]:
-                service = Service(
-                    business_id=business.id,
-                    service_type=service_data["service_type"],
-                    service_name=service_data["service_name"],
-                    monthly_price=service_data["monthly_price"],
-                    details=service_data["details"],
-                    contract_start=parse_date(service_data["contract_start"]),
-                    contract_end=parse_date(service_data["contract_end"]),
-                    status=service_data["status"]
-                )
-                db.add(service)
+            if business_rows:
+                _insert_rows(conn, business_rows, service_rows)
+                loaded += len(business_rows)
             
-            # Commit every 50 businesses to avoid memory issues
-            if (i + 1) % 50 == 0:
-                db.commit()
-                print(f"Committed {i + 1} businesses...")
-        
-        # Final commit
-        db.commit()
-        print(f"Successfully loaded {len(data)} businesses!")
+            # Tell running API workers the data changed (new ETags, fresh caches)
+            conn.execute(DataVersion.__table__.update().values(version=DataVersion.version + 1))
+        print(f"Successfully loaded {loaded} businesses!")
         
         # Print summary
-        business_count = db.query(Business).count()
-        service_count = db.query(Service).count()
-        total_revenue = db.query(Business.total_monthly_revenue).all()
-        total_revenue_sum = sum([r[0] for r in total_revenue])
+        with SessionLocal() as db:
+            business_count = db.query(Business).count()
+            service_count = db.query(Service).count()
+            # Let the database add up the revenue instead of fetching every row
+            total_revenue_sum = db.query(func.sum(Business.total_monthly_revenue)).scalar() or 0.0
         
-        print(f"\nDatabase Summary:")
-        print(f"  Businesses: {business_count}")
-        print(f"  Services: {service_count}")
-        print(f"  Total Monthly Revenue: ${total_revenue_sum:,.2f}")
-        print(f"  Average Revenue per Business: ${total_revenue_sum/business_count:,.2f}")
+            print(f"\nDatabase Summary:")
+            print(f"  Businesses: {business_count}")
+            print(f"  Services: {service_count}")
+            print(f"  Total Monthly Revenue: ${total_revenue_sum:,.2f}")
+            print(f"  Average Revenue per Business: ${total_revenue_sum/business_count:,.2f}")
         
     except Exception as e:
         print(f"Error loading data: {e}")
-        db.rollback()
         raise
-    finally:
-        db.close()
 
 def main():
     """Main function"""
@@ -10,10 +10,28 @@ from dotenv import load_dotenv
 load_dotenv()
 
 if __name__ == "__main__":
+    # ENV=dev runs a single auto-reloading worker; otherwise serve with one
+    # worker per core on uvloop/httptools and without per-request access logs
+    dev = os.getenv("ENV", "prod") == "dev"
+    workers = 1 if dev else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    
+    # Several workers would each run create_all at import and race on a fresh
+    # database, so create the tables once here and switch it off in the workers
+    if workers > 1 and os.getenv("AUTO_CREATE_TABLES", "true") == "true":
+        from app.database import engine
+        from app.models import create_schema
+        create_schema(engine)
+        engine.dispose()
+        os.environ["AUTO_CREATE_TABLES"] = "false"
+    
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", 8000)),
-        reload=True,
-        log_level="info"
-    ) 
\ No newline at end of file
+        reload=dev,
+        workers=workers,
+        loop="auto" if dev else "uvloop",
+        http="auto" if dev else "httptools",
+        log_level="info",
+        access_log=dev
+    )
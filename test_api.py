@@ -2,229 +2,330 @@
 """
 Test script for Bell Canada B2B API
 Tests basic functionality and endpoints
+
+Needs the API running on BASE_URL. Run with `python test_api.py` or
+`pytest test_api.py`. Keep the run serial: the write tests edit shared
+data and would interfere with each other across pytest-xdist workers.
 """
 
-import requests
-import json
-import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+import base64
+import httpx
+import pytest
+import hashlib
+import importlib.util
+import orjson
+import os
 import sys
+import time
 
 BASE_URL = "http://localhost:8000"
 
-def test_health():
-    """Test health endpoint"""
-    print("Testing health endpoint...")
+# Every endpoint the tests hit, resolved once; {business_id} and {service_id} are filled in per call
+PATHS = {
+    "health": "/health",
+    "root": "/",
+    "businesses": "/api/v1/businesses",
+    "business": "/api/v1/businesses/{business_id}",
+    "business_services": "/api/v1/businesses/{business_id}/services",
+    "service": "/api/v1/services/{service_id}",
+    "revenue_analytics": "/api/v1/analytics/revenue",
+    "customer_analytics": "/api/v1/analytics/customers",
+    "industries": "/api/v1/industries",
+    "provinces": "/api/v1/provinces",
+    "service_types": "/api/v1/service-types",
+    "batch": "/api/v1/batch",
+}
+URLS = {name: BASE_URL + path for name, path in PATHS.items()}
+
+# Small metadata endpoints fetched together through /api/v1/batch
+METADATA = ["health", "root", "industries", "provinces", "service_types"]
+
+# Added to a sample business by the write tests, then deleted again
+SAMPLE_SERVICE = {
+    "service_type": "Cloud",
+    "service_name": "Test Cloud Backup",
+    "monthly_price": 49.99,
+    "details": {"storage": "1 TB"},
+    "contract_start": "2024-01-01T00:00:00",
+    "contract_end": "2026-01-01T00:00:00",
+    "status": "Active"
+}
+
+# Set TEST_CACHE=1 to replay GET responses recorded by an earlier run instead
+# of hitting the API again; delete .test_cache/ when the data changes
+TEST_CACHE = os.environ.get("TEST_CACHE") == "1"
+CACHE_DIR = Path(".test_cache")
+
+# Bound each request so a hung server fails the suite instead of stalling it:
+# 1s to connect, 5s for everything else. Refused connections and gateway
+# errors are retried RETRIES times, the latter with exponential backoff.
+TIMEOUT = httpx.Timeout(5.0, connect=1.0)
+RETRIES = 2
+RETRY_BACKOFF = 0.1
+RETRY_STATUSES = {502, 503, 504}
+
+# HTTP/2 multiplexes the parallel requests over one connection when the server
+# offers it (e.g. behind a TLS proxy); it needs the optional h2 package
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Stands in for an httpx.Response when a body is replayed from the cache
+FakeResp = namedtuple("FakeResp", ["status_code", "content"])
+
+def jbody(response):
+    """Decode a JSON response body with orjson rather than the stdlib json"""
+    return orjson.loads(response.content)
+
+def _get(session, url, params=None):
+    """GET a URL, retrying gateway errors with exponential backoff"""
+    for attempt in range(RETRIES + 1):
+        response = session.get(url, params=params)
+        if response.status_code not in RETRY_STATUSES or attempt == RETRIES:
+            return response
+        time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+def cached_get(session, url, params=None):
+    """GET a URL, replaying it from the on-disk cache when TEST_CACHE is set"""
+    if not TEST_CACHE:
+        return _get(session, url, params)
+
+    key = f"GET {httpx.URL(url, params=params)}"
+    path = CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+    # Only successful responses are recorded, so a cached body is always a 200
+    if path.exists():
+        return FakeResp(200, path.read_bytes())
+
+    response = _get(session, url, params)
+    if response.status_code == 200:
+        CACHE_DIR.mkdir(exist_ok=True)
+        path.write_bytes(response.content)
+    return response
+
+def fetch_static(session, name):
+    """Decoded body of a metadata endpoint, for servers without /api/v1/batch"""
+    response = cached_get(session, URLS[name])
+    assert response.status_code == 200, f"{name} failed: {response.status_code}"
+    return jbody(response)
+
+@pytest.fixture(scope="session")
+def api_session():
+    """One pooled keep-alive client shared by every test (and their threads)"""
+    transport = httpx.HTTPTransport(
+        http2=HTTP2,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        retries=RETRIES
+    )
+    with httpx.Client(
+        transport=transport,
+        timeout=TIMEOUT,
+        headers={"Accept": "application/json"}
+    ) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def metadata(api_session):
+    """Bodies of the METADATA endpoints by name, fetched in one batch round-trip"""
     try:
-        response = requests.get(f"{BASE_URL}/health")
-        if response.status_code == 200:
-            print("✅ Health check passed")
-            return True
-        else:
-            print(f"❌ Health check failed: {response.status_code}")
-            return False
-    except requests.exceptions.ConnectionError:
-        print("❌ Cannot connect to API. Make sure the server is running.")
-        return False
-
-def test_root():
+        response = api_session.post(URLS["batch"], json={"requests": [PATHS[name] for name in METADATA]})
+    except httpx.ConnectError:
+        pytest.fail("Cannot connect to API. Make sure the server is running.")
+
+    if response.status_code == 200:
+        results = jbody(response)["results"]
+        return {name: results[PATHS[name]] for name in METADATA}
+
+    # Servers without /api/v1/batch: fetch the endpoints individually, in parallel
+    assert response.status_code in (404, 405), f"Batch request failed: {response.status_code}"
+    with ThreadPoolExecutor(max_workers=len(METADATA)) as executor:
+        return dict(zip(METADATA, executor.map(partial(fetch_static, api_session), METADATA)))
+
+@pytest.fixture(scope="session")
+def business_id(api_session):
+    """Id of the first business, looked up once for the tests that need one"""
+    response = cached_get(api_session, URLS["businesses"], params={"limit": 1})
+    assert response.status_code == 200, f"Cannot get business: {response.status_code}"
+    businesses = jbody(response).get('businesses')
+    assert businesses, "No businesses loaded - run load_data.py"
+    return businesses[0]['id']
+
+@pytest.fixture(scope="session")
+def other_business_id(api_session):
+    """Id of the second business, for tests that move data between businesses"""
+    response = cached_get(api_session, URLS["businesses"], params={"limit": 2})
+    assert response.status_code == 200, f"Cannot get business: {response.status_code}"
+    businesses = jbody(response).get('businesses')
+    assert len(businesses) == 2, "Need at least two businesses - run load_data.py"
+    return businesses[1]['id']
+
+@pytest.fixture
+def temp_service(api_session, business_id):
+    """Id of a service added to the sample business for one test and deleted afterwards"""
+    response = api_session.post(URLS["business_services"].format(business_id=business_id), json=SAMPLE_SERVICE)
+    assert response.status_code == 201, f"Create service failed: {response.status_code}"
+    service_id = jbody(response)['id']
+    yield service_id
+    # Already gone if the test deleted it itself
+    api_session.delete(URLS["service"].format(service_id=service_id))
+
+def assert_revenue_matches_services(session, business_id):
+    """Check a business's total_monthly_revenue against the sum of its services' prices"""
+    # Read past TEST_CACHE, which would replay the revenue from before the edit
+    response = _get(session, URLS["business"].format(business_id=business_id))
+    assert response.status_code == 200, f"Get business by ID failed: {response.status_code}"
+    business = jbody(response)
+    expected = sum(service['monthly_price'] for service in business['services'])
+    assert business['total_monthly_revenue'] == pytest.approx(expected, abs=0.01), \
+        f"{business_id} revenue no longer matches its services"
+
+def test_health(metadata):
+    """Test health endpoint"""
+    assert metadata["health"].get('status') == "healthy"
+
+def test_root(metadata):
     """Test root endpoint"""
-    print("Testing root endpoint...")
-    try:
-        response = requests.get(f"{BASE_URL}/")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Root endpoint working - API version: {data.get('version')}")
-            return True
-        else:
-            print(f"❌ Root endpoint failed: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Root endpoint error: {e}")
-        return False
-
-def test_businesses():
+    assert metadata["root"].get('version')
+
+def test_businesses(api_session, business_id):
     """Test businesses endpoints"""
-    print("Testing businesses endpoints...")
-    
     # Test list businesses
-    try:
-        response = requests.get(f"{BASE_URL}/api/v1/businesses?limit=5")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Businesses list working - Found {data.get('total', 0)} businesses")
-            
-            # Test getting first business
-            if data.get('businesses'):
-                first_business = data['businesses'][0]
-                business_id = first_business['id']
-                
-                # Test get specific business
-                response = requests.get(f"{BASE_URL}/api/v1/businesses/{business_id}")
-                if response.status_code == 200:
-                    print(f"✅ Get business by ID working - {business_id}")
-                else:
-                    print(f"❌ Get business by ID failed: {response.status_code}")
-                    return False
-            return True
-        else:
-            print(f"❌ Businesses list failed: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Businesses endpoint error: {e}")
-        return False
-
-def test_services():
+    response = cached_get(api_session, URLS["businesses"], params={"limit": 5})
+    assert response.status_code == 200, f"Businesses list failed: {response.status_code}"
+    assert jbody(response).get('total', 0) > 0
+
+    # Test get specific business
+    response = cached_get(api_session, URLS["business"].format(business_id=business_id))
+    assert response.status_code == 200, f"Get business by ID failed: {response.status_code}"
+    assert jbody(response)['id'] == business_id
+
+def test_business_cursor_pagination(api_session):
+    """Test that next_cursor pages match the equivalent skip pages"""
+    response = cached_get(api_session, URLS["businesses"], params={"limit": 2})
+    assert response.status_code == 200, f"Businesses list failed: {response.status_code}"
+    first_page = jbody(response)
+    assert first_page['next_cursor'], "A full page should return a next_cursor"
+
+    by_cursor = cached_get(api_session, URLS["businesses"], params={"limit": 2, "after": first_page['next_cursor']})
+    by_skip = cached_get(api_session, URLS["businesses"], params={"limit": 2, "skip": 2})
+    assert by_cursor.status_code == 200, f"Cursor page failed: {by_cursor.status_code}"
+    assert by_skip.status_code == 200, f"Skip page failed: {by_skip.status_code}"
+
+    by_cursor, by_skip = jbody(by_cursor), jbody(by_skip)
+    assert [b['id'] for b in by_cursor['businesses']] == [b['id'] for b in by_skip['businesses']]
+    assert by_cursor['total'] == first_page['total']
+    assert by_cursor['page'] is None
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b'[[1], [2]]').decode(),
+    base64.urlsafe_b64encode(b'["only one"]').decode()
+])
+def test_business_invalid_cursor(api_session, cursor):
+    """Test that malformed cursors are rejected with 400"""
+    response = cached_get(api_session, URLS["businesses"], params={"after": cursor})
+    assert response.status_code == 400, f"Expected 400 for cursor {cursor!r}: {response.status_code}"
+
+def test_services(api_session, business_id):
     """Test services endpoints"""
-    print("Testing services endpoints...")
-    
-    try:
-        # Get first business to test services
-        response = requests.get(f"{BASE_URL}/api/v1/businesses?limit=1")
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('businesses'):
-                business_id = data['businesses'][0]['id']
-                
-                # Test get business services
-                response = requests.get(f"{BASE_URL}/api/v1/businesses/{business_id}/services")
-                if response.status_code == 200:
-                    services = response.json()
-                    print(f"✅ Business services working - {len(services)} services found")
-                    return True
-                else:
-                    print(f"❌ Business services failed: {response.status_code}")
-                    return False
-        else:
-            print(f"❌ Cannot get business for services test: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Services endpoint error: {e}")
-        return False
-
-def test_analytics():
+    # Test get business services
+    response = cached_get(api_session, URLS["business_services"].format(business_id=business_id))
+    assert response.status_code == 200, f"Business services failed: {response.status_code}"
+    assert isinstance(jbody(response), list)
+
+def test_service_edits_keep_revenue_in_sync(api_session, business_id, other_business_id, temp_service):
+    """Test revenue deltas for service create, update, move and delete"""
+    service_url = URLS["service"].format(service_id=temp_service)
+
+    # Created by the temp_service fixture
+    assert_revenue_matches_services(api_session, business_id)
+
+    response = api_session.put(service_url, json={"monthly_price": 99.5})
+    assert response.status_code == 200, f"Update service failed: {response.status_code}"
+    assert_revenue_matches_services(api_session, business_id)
+
+    response = api_session.put(service_url, json={"business_id": other_business_id})
+    assert response.status_code == 200, f"Move service failed: {response.status_code}"
+    assert_revenue_matches_services(api_session, business_id)
+    assert_revenue_matches_services(api_session, other_business_id)
+
+    response = api_session.delete(service_url)
+    assert response.status_code == 200, f"Delete service failed: {response.status_code}"
+    assert_revenue_matches_services(api_session, other_business_id)
+
+@pytest.mark.parametrize("field", ["monthly_price", "service_type", "status", "contract_end"])
+def test_service_update_rejects_null(api_session, business_id, temp_service, field):
+    """Test an explicit null in a service update is a 422 and changes nothing"""
+    service_url = URLS["service"].format(service_id=temp_service)
+    response = api_session.put(service_url, json={field: None})
+    assert response.status_code == 422, f"Expected 422 for a null {field}: {response.status_code}"
+
+    response = _get(api_session, URLS["business"].format(business_id=business_id))
+    assert response.status_code == 200, f"Get business by ID failed: {response.status_code}"
+    assert_revenue_matches_services(api_session, business_id)
+
+def test_analytics(api_session):
     """Test analytics endpoints"""
-    print("Testing analytics endpoints...")
-    
-    try:
-        # Test revenue analytics
-        response = requests.get(f"{BASE_URL}/api/v1/analytics/revenue")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Revenue analytics working - Total revenue: ${data.get('total_monthly_revenue', 0):,.2f}")
-        else:
-            print(f"❌ Revenue analytics failed: {response.status_code}")
-            return False
-        
-        # Test customer analytics
-        response = requests.get(f"{BASE_URL}/api/v1/analytics/customers")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Customer analytics working - Total customers: {data.get('total_customers', 0)}")
-        else:
-            print(f"❌ Customer analytics failed: {response.status_code}")
-            return False
-        
-        return True
-    except Exception as e:
-        print(f"❌ Analytics endpoint error: {e}")
-        return False
-
-def test_utilities():
+    # Revenue and customer analytics are independent, so fetch them in parallel
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        revenue_response, customer_response = executor.map(partial(cached_get, api_session), [
+            URLS["revenue_analytics"],
+            URLS["customer_analytics"]
+        ])
+
+    # Test revenue analytics
+    assert revenue_response.status_code == 200, f"Revenue analytics failed: {revenue_response.status_code}"
+    assert 'total_monthly_revenue' in jbody(revenue_response)
+
+    # Test customer analytics
+    assert customer_response.status_code == 200, f"Customer analytics failed: {customer_response.status_code}"
+    assert 'total_customers' in jbody(customer_response)
+
+def test_etag_not_modified(api_session, temp_service):
+    """Test If-None-Match answers 304 until a write changes the ETag"""
+    service_url = URLS["service"].format(service_id=temp_service)
+    response = api_session.put(service_url, json={"monthly_price": 60.0})
+    assert response.status_code == 200, f"Update service failed: {response.status_code}"
+
+    response = api_session.get(URLS["revenue_analytics"])
+    assert response.status_code == 200, f"Revenue analytics failed: {response.status_code}"
+    etag = response.headers.get("ETag")
+    assert etag, "Revenue analytics returned no ETag"
+
+    response = api_session.get(URLS["revenue_analytics"], headers={"If-None-Match": etag})
+    assert response.status_code == 304, f"Expected 304 for an unchanged ETag: {response.status_code}"
+
+    # A second write must change the ETag, so the old one gets a full response again
+    response = api_session.put(service_url, json={"monthly_price": 75.25})
+    assert response.status_code == 200, f"Update service failed: {response.status_code}"
+
+    response = api_session.get(URLS["revenue_analytics"], headers={"If-None-Match": etag})
+    assert response.status_code == 200, f"Expected 200 after a write: {response.status_code}"
+    assert response.headers.get("ETag") != etag
+
+def test_utilities(metadata):
     """Test utility endpoints"""
-    print("Testing utility endpoints...")
-    
-    try:
-        # Test industries
-        response = requests.get(f"{BASE_URL}/api/v1/industries")
-        if response.status_code == 200:
-            industries = response.json()
-            print(f"✅ Industries endpoint working - {len(industries)} industries")
-        else:
-            print(f"❌ Industries endpoint failed: {response.status_code}")
-            return False
-        
-        # Test provinces
-        response = requests.get(f"{BASE_URL}/api/v1/provinces")
-        if response.status_code == 200:
-            provinces = response.json()
-            print(f"✅ Provinces endpoint working - {len(provinces)} provinces")
-        else:
-            print(f"❌ Provinces endpoint failed: {response.status_code}")
-            return False
-        
-        # Test service types
-        response = requests.get(f"{BASE_URL}/api/v1/service-types")
-        if response.status_code == 200:
-            service_types = response.json()
-            print(f"✅ Service types endpoint working - {len(service_types)} service types")
-        else:
-            print(f"❌ Service types endpoint failed: {response.status_code}")
-            return False
-        
-        return True
-    except Exception as e:
-        print(f"❌ Utility endpoints error: {e}")
-        return False
-
-def test_filtering():
+    for name in ["industries", "provinces", "service_types"]:
+        assert metadata[name], f"{name} returned no values"
+
+@pytest.mark.parametrize("query", [{"search": "Technology"}, {"industry": "Technology"}])
+def test_filtering(api_session, query):
     """Test filtering and search functionality"""
-    print("Testing filtering and search...")
-    
-    try:
-        # Test search
-        response = requests.get(f"{BASE_URL}/api/v1/businesses?search=Technology&limit=5")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Search working - Found {len(data.get('businesses', []))} businesses with 'Technology'")
-        else:
-            print(f"❌ Search failed: {response.status_code}")
-            return False
-        
-        # Test industry filter
-        response = requests.get(f"{BASE_URL}/api/v1/businesses?industry=Technology&limit=5")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Industry filter working - Found {len(data.get('businesses', []))} Technology businesses")
-        else:
-            print(f"❌ Industry filter failed: {response.status_code}")
-            return False
-        
-        return True
-    except Exception as e:
-        print(f"❌ Filtering error: {e}")
-        return False
+    response = cached_get(api_session, URLS["businesses"], params={**query, "limit": 5})
+    assert response.status_code == 200, f"{query} failed: {response.status_code}"
+    assert isinstance(jbody(response).get('businesses'), list)
 
 def main():
     """Run all tests"""
     print("🚀 Starting Bell Canada B2B API Tests")
     print("=" * 50)
-    
-    tests = [
-        test_health,
-        test_root,
-        test_businesses,
-        test_services,
-        test_analytics,
-        test_utilities,
-        test_filtering
-    ]
-    
-    passed = 0
-    total = len(tests)
-    
-    for test in tests:
-        try:
-            if test():
-                passed += 1
-            print()
-        except Exception as e:
-            print(f"❌ Test {test.__name__} crashed: {e}")
-            print()
-    
+
+    # Extra arguments are passed through, e.g. `python test_api.py -k analytics`
+    exit_code = pytest.main([__file__, *sys.argv[1:]])
+
     print("=" * 50)
-    print(f"📊 Test Results: {passed}/{total} tests passed")
-    
-    if passed == total:
+    if exit_code == 0:
         print("🎉 All tests passed! Your API is working correctly.")
         print("\n📖 Next steps:")
         print("1. Visit http://localhost:8000/docs for interactive API documentation")
@@ -232,7 +333,7 @@ def main():
         print("3. Start integrating with Salesforce!")
     else:
         print("⚠️  Some tests failed. Check the errors above.")
-        sys.exit(1)
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()